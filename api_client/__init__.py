@@ -0,0 +1,73 @@
+import importlib
+import sys
+import time
+
+from logger import logger
+
+"""
+ERP client registry
+-------------------
+
+The ERP client is chosen with the `erp_client` config key instead of an
+import in `app.py`. Only the module of the selected client is imported, so
+e.g. pandas is only loaded for the mock client and a Monitor G5 site never
+pays for it in startup time or memory.
+
+Built-in clients are listed in CLIENTS. Your own client can be registered
+with `register_client()` or configured directly as `package.module:Class`.
+
+`python -m api_client <name>` prints how long importing and creating a
+client takes in a fresh interpreter, and which heavy modules it pulled in.
+"""
+
+CLIENTS: dict[str, str] = {
+    'mock': 'api_client.mock_client:MockERPClient',
+    'monitor_g5': 'api_client.monitor_g5_client:MonitorG5Client',
+    'sql': 'api_client.sql_client:SQLClient',
+}
+
+# Modules worth knowing about in the startup report.
+HEAVY_MODULES = ('pandas', 'numpy')
+
+
+def register_client(name: str, target: str) -> None:
+    """ Registers a client as `package.module:Class` under `name`. """
+    CLIENTS[name] = target
+
+
+def load_client_class(name: str) -> type:
+    """ Imports and returns the client class, importing nothing else. """
+    target = CLIENTS.get(name, name)
+    module_name, _, class_name = target.partition(':')
+    if not class_name:
+        raise ValueError(
+            f'Unknown ERP client "{name}", expected one of '
+            f'{", ".join(CLIENTS)} or package.module:Class')
+
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_client(name: str):
+    """ Creates the configured ERP client and logs what it cost. """
+    report = startup_report(name)
+    logger.info(
+        f'ERP client "{name}" ready: import {report["import_ms"]:.0f} ms, '
+        f'init {report["init_ms"]:.0f} ms, heavy modules: '
+        f'{", ".join(report["heavy_modules"]) or "none"}')
+    return report['client']
+
+
+def startup_report(name: str) -> dict:
+    """ Imports and creates a client, timing both steps. """
+    started = time.perf_counter()
+    client_class = load_client_class(name)
+    imported = time.perf_counter()
+    client = client_class()
+    ready = time.perf_counter()
+
+    return {
+        'client': client,
+        'import_ms': (imported - started) * 1000,
+        'init_ms': (ready - imported) * 1000,
+        'heavy_modules': [m for m in HEAVY_MODULES if m in sys.modules]
+    }
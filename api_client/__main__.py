@@ -0,0 +1,59 @@
+import argparse
+import sys
+import time
+
+from api_client import CLIENTS, HEAVY_MODULES, load_client_class
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, RSS is skipped there
+    resource = None
+
+"""
+Prints the startup cost of an ERP client, run in a fresh interpreter so
+nothing is imported yet:
+
+    python -m api_client mock
+    python -m api_client monitor_g5
+"""
+
+
+def max_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes on Linux.
+    return rss / 2 ** 20 if sys.platform == 'darwin' else rss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Report the import and init time of an ERP client.')
+    parser.add_argument('client', nargs='?', default='mock',
+                        help=f'One of {", ".join(CLIENTS)} or '
+                             f'package.module:Class')
+    args = parser.parse_args()
+
+    before = max_rss_mb()
+    started = time.perf_counter()
+    client_class = load_client_class(args.client)
+    imported = time.perf_counter()
+    try:
+        client_class()
+        init = f'{(time.perf_counter() - imported) * 1000:.0f} ms'
+    except Exception as e:
+        # Import cost is still worth knowing for an unconfigured client.
+        init = f'failed ({e})'
+    after = max_rss_mb()
+
+    heavy = [m for m in HEAVY_MODULES if m in sys.modules]
+    print(f'ERP client:    {args.client}')
+    print(f'Import:        {(imported - started) * 1000:.0f} ms')
+    print(f'Init:          {init}')
+    print(f'Heavy modules: {", ".join(heavy) or "none"}')
+    if before is not None:
+        print(f'Peak RSS:      {after:.0f} MB (+{after - before:.0f} MB)')
+
+
+if __name__ == '__main__':
+    main()
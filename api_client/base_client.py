@@ -1,8 +1,9 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from datetime import datetime
 
 
-@dataclass
+@dataclass(frozen=True)
 class UsersList:
     id_number: int
     name: str
@@ -15,3 +16,14 @@ class BaseERPClient(ABC):
     @abstractmethod
     def get_workers(self) -> list[UsersList]:
         pass
+
+    def stats(self) -> dict:
+        """ Client specific counters, e.g. logins and refresh latency. """
+        return {}
+
+    def next_change(self, now: datetime) -> datetime | None:
+        """
+        Time of the next scheduled clock-in/clock-out, if the client knows
+        its schedule. Used to poll more often around shift changes.
+        """
+        return None
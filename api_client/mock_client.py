@@ -1,9 +1,11 @@
-from datetime import datetime
+import os
+from datetime import datetime, timedelta
 from pathlib import Path
 
 import pandas as pd
 
 from .base_client import BaseERPClient, UsersList
+from .shift_index import ShiftIndex
 
 """
 MockERPClient
@@ -33,35 +35,101 @@ This client is primarily used for:
 
 Output is a list of UsersList dataclass instances, consistent with all
 other ERP client implementations.
+
+The CSV is only parsed again when its mtime changes. On each load the
+clock times are converted to minutes past midnight and both a present and
+an absent UsersList is built per row, so a refresh is a vectorized time
+comparison plus picking one of two prebuilt objects per row. This keeps
+large synthetic rosters usable for load-testing the UI.
+
+Since the sample schedule is known up front, the client also keeps a
+ShiftIndex of the clock-in/out boundaries and can tell the presence poller
+when the next change happens.
 """
 
+MINUTES_PER_DAY = 24 * 60
+
+
+def _to_minutes(times: pd.Series) -> pd.Series:
+    """
+    Converts zero-padded 'HH:MM' strings to minutes past midnight. Anything
+    else (e.g. 'sick') becomes NaN, which never counts as clocked in.
+    """
+    times = times.astype(str)
+    hours = pd.to_numeric(times.str.slice(0, 2), errors='coerce')
+    minutes = pd.to_numeric(times.str.slice(3, 5), errors='coerce')
+    return hours * 60 + minutes
+
 
 class MockERPClient(BaseERPClient):
     def __init__(self, sample_data_path=None):
         if sample_data_path is None:
             sample_data_path = Path(
                 __file__).parent.parent / 'data' / 'sample_data.csv'
-            self.sample_data_path = sample_data_path
+        self.sample_data_path = sample_data_path
+
+        self._mtime: int | None = None
+        self._clocked_in = None
+        self._clocked_out = None
+        self._present: list[UsersList] = []
+        self._absent: list[UsersList] = []
+        self.shift_index = ShiftIndex(())
 
     def get_workers(self) -> list[UsersList]:
-        current_time = datetime.now().strftime('%H:%M')
-        df = pd.read_csv(self.sample_data_path)
+        self._load()
+
+        now = datetime.now()
+        current_minute = now.hour * 60 + now.minute
 
         # Checks if sample user is clocked in.
-        df['status'] = (
-                (df['clocked_in'] <= current_time) &
-                (df['clocked_out'] >= current_time)
-        )
+        status = ((self._clocked_in <= current_minute) &
+                  (self._clocked_out >= current_minute)).tolist()
 
-        output = [
-            UsersList(
-                id_number=row['id_number'],
-                name=row['name'],
-                location=row['location'],
-                department=row.get('department', 0),
-                status=row['status']
-            )
-            for _, row in df.iterrows()
+        return [
+            present if clocked_in else absent
+            for present, absent, clocked_in in
+            zip(self._present, self._absent, status)
         ]
 
-        return output
+    def next_change(self, now: datetime) -> datetime | None:
+        self._load()
+
+        minute = now.hour * 60 + now.minute
+        change = self.shift_index.next_change(minute)
+        if change is None:
+            # Same schedule tomorrow
+            change = self.shift_index.next_change(-1)
+            if change is None:
+                return None
+            change += MINUTES_PER_DAY
+
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        return midnight + timedelta(minutes=int(change))
+
+    def _load(self) -> None:
+        """ Parses the CSV again only if it changed since the last call. """
+        mtime = os.stat(self.sample_data_path).st_mtime_ns
+        if mtime == self._mtime:
+            return
+
+        df = pd.read_csv(self.sample_data_path)
+        if 'department' not in df.columns:
+            df['department'] = 0
+
+        self._clocked_in = _to_minutes(df['clocked_in']).to_numpy()
+        self._clocked_out = _to_minutes(df['clocked_out']).to_numpy()
+
+        rows = list(zip(df['id_number'].tolist(), df['name'].tolist(),
+                        df['location'].tolist(),
+                        df['department'].tolist()))
+        self._present = [UsersList(*row, status=True) for row in rows]
+        self._absent = [UsersList(*row, status=False) for row in rows]
+
+        # Clocked out is inclusive, so presence ends a minute later.
+        self.shift_index = ShiftIndex(
+            (row, start, end + 1)
+            for row, (start, end) in enumerate(
+                zip(self._clocked_in.tolist(), self._clocked_out.tolist()))
+            if start == start and end == end  # Skips NaN (e.g. 'sick')
+        )
+        self._mtime = mtime
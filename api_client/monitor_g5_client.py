@@ -1,11 +1,17 @@
 import requests
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import yaml
 
+import metrics
 from api_client.base_client import BaseERPClient, UsersList
+from api_client.persons_cache import PersonsCache
 from logger import logger
+from paths import data_path
 
 """
 MonitorG5Client
@@ -16,8 +22,9 @@ to retrieve and filter currently clocked-in workers for use in the
 OnSite Presence Monitor application.
 
 It pulls raw attendance interval data from the Monitor TimeRecording API,
-enriches that data with person metadata (name, location), and filters
-the resulting user list by location (e.g. Factory, Office, Home Office).
+enriches that data with person metadata (name, location, department).
+Location filtering (e.g. Factory, Office, Home Office) is done by the app,
+so one client can serve kiosks for every site.
 
 The goal is to deliver an accurate, real-time list of personnel
 physically present at a specified site — enabling use cases such as:
@@ -33,7 +40,9 @@ modifying the app itself.
 Configuration is loaded from `config.yaml` and includes:
 - erp_api_url: Base URL of the Monitor G5 API
 - erp_api_key: Bearer token for authorization (if required)
-- location: The physical site to filter for (e.g. "Factory")
+- erp_timeout_seconds: Timeout for each individual API request
+- persons_cache_ttl_seconds: How long the Persons directory is reused
+- persons_cache_file: On-disk copy of the Persons directory ('' = memory)
 
 API URL build:
 https://{host}:8001/{languageCode}/{companyNumber}/api/v1
@@ -46,31 +55,66 @@ Expected API endpoints:
 - GET /api/v1/Persons
 
 Returned values are mapped to the UsersList dataclass for use by the app.
+
+Sessions:
+The login session (`x-monitor-sessionid`) and the pooled keep-alive
+connections of `requests.Session` are reused across refreshes. The client
+only logs in again when the API answers with an expired session (HTTP 401),
+and then retries the request once. Login counts and refresh latency are
+available through `stats()`, and login, Persons and AttendanceChart
+latencies are recorded in `metrics` for the `/metrics` endpoint.
+
+Persons and AttendanceChart are fetched concurrently on a small, bounded
+thread pool, so a refresh takes roughly as long as the slower of the two.
+Once the Persons directory is cached, only AttendanceChart is fetched until
+the cache expires or an unknown EmployeeId shows up in the attendance.
 """
 
 # Activating DEBUG will print out part of the responses to check filtering.
 DEBUG = False
 
+# Status codes the API uses for a missing or expired login session.
+SESSION_EXPIRED_STATUS = (401,)
+
+# Persons and AttendanceChart, the only two calls made per refresh.
+FETCH_WORKERS = 2
+
 
 class MonitorG5Client(BaseERPClient):
-    def __init__(self) -> None:
+    def __init__(self, config: dict | None = None) -> None:
+        """ Reads config.yaml unless a `config` dict is given. """
         config_path = Path(__file__).resolve().parent.parent / 'config.yaml'
-        if config_path.exists():
+        if config is None:
+            if not config_path.exists():
+                logger.critical(f'Config.yaml not found: {config_path}')
+                raise FileNotFoundError('config.yaml not found')
             with open(config_path, mode='r', encoding='utf-8') as f:
                 config = yaml.safe_load(f)
-        else:
-            logger.critical(f'Config.yaml not found: {config_path}')
-            raise FileNotFoundError('config.yaml not found')
 
         self.api_url = config.get('erp_api_url', '').rstrip('/')
         self.api_user = config.get('erp_api_user', '')
         self.api_key = config.get('erp_api_key', '')
-        self.target_location = config.get('location', 'Factory')
-        self.allowed_locations = ['Factory', 'Office']
+        self.timeout = config.get('erp_timeout_seconds', 10)
         self._validate_api_url(self.api_url)
 
+        self.persons_cache = PersonsCache(
+            ttl_seconds=config.get('persons_cache_ttl_seconds', 3600),
+            path=data_path(config.get('persons_cache_file',
+                                      'data/persons_cache.json'))
+        )
+
         self.session = requests.Session()
         self.session.verify = False
+        self.session_id: str | None = None
+        self._login_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=FETCH_WORKERS, thread_name_prefix='MonitorG5Fetch')
+
+        self._started = time.monotonic()
+        self._logins = 0
+        self._refreshes = 0
+        self._refresh_seconds_total = 0.0
+        self._last_refresh_seconds: float | None = None
 
     def authenticate(self) -> str:
         """ Authenticate with the Monitor G5 API """
@@ -86,12 +130,14 @@ class MonitorG5Client(BaseERPClient):
             'ForceRelogin': True
         }
 
-        response = requests.post(
-            url=f'{self.api_url}/login',
-            headers=header,
-            json=payload,
-            verify=False
-        )
+        with metrics.ERP_LOGIN_SECONDS.time():
+            response = self.session.post(
+                url=f'{self.api_url}/login',
+                headers=header,
+                json=payload,
+                timeout=self.timeout
+            )
+        response.raise_for_status()
 
         session_id = response.headers['x-monitor-sessionid']
 
@@ -100,8 +146,28 @@ class MonitorG5Client(BaseERPClient):
             'x-monitor-sessionid': session_id
         })
 
+        self.session_id = session_id
+        self._logins += 1
+        metrics.ERP_LOGINS.inc()
+        logger.info(f'Logged in to Monitor ERP (login #{self._logins})')
+
         return session_id
 
+    def stats(self) -> dict:
+        """ Login rate and refresh latency since the client was created. """
+        uptime_hours = (time.monotonic() - self._started) / 3600
+        avg = (self._refresh_seconds_total / self._refreshes
+               if self._refreshes else None)
+
+        return {
+            'logins': self._logins,
+            'logins_per_hour': (self._logins / uptime_hours
+                                if uptime_hours else 0.0),
+            'refreshes': self._refreshes,
+            'last_refresh_seconds': self._last_refresh_seconds,
+            'avg_refresh_seconds': avg
+        }
+
     def get_workers(self) -> list[UsersList]:
         """
         Gets list of workers and attendance data. Filters out based upon the
@@ -110,15 +176,22 @@ class MonitorG5Client(BaseERPClient):
         Filtering on absence code is nessessary since sickleave can be used
         with an open interval.
         """
-        logger.info(
-            f'Fetching active attendance from Monitor ERP server: '
-            f'{self.api_url}')
+        started = time.perf_counter()
 
         try:
-            self.authenticate()
+            with self._login_lock:
+                if self.session_id is None:
+                    self.authenticate()
+
+            if self.persons_cache.is_fresh:
+                attendance = self._fetch_attendance_chart()
+            else:
+                persons_job = self._executor.submit(self._fetch_persons)
+                attendance_job = self._executor.submit(
+                    self._fetch_attendance_chart)
 
-            persons = self._fetch_persons()
-            attendance = self._fetch_attendance_chart()
+                self._update_persons(persons_job.result)
+                attendance = attendance_job.result()
 
             # Collect only workers who are actively clocked in
             active_ids = {
@@ -128,13 +201,23 @@ class MonitorG5Client(BaseERPClient):
                    and a.get('AbsenceCode') is None
             }
 
+            missing = self.persons_cache.missing(active_ids)
+            refetched = self.persons_cache.may_refetch_missing(missing)
+            if refetched:
+                logger.info(
+                    f'Unknown EmployeeId(s) {sorted(missing)}, '
+                    f'refreshing persons')
+                self._update_persons(self._fetch_persons)
+
+            persons = self.persons_cache.persons
             workers = []
 
             for pid in active_ids:
                 person = persons.get(pid)
                 if not person:
-                    logger.warning(
-                        f'No person info found for EmployeeId {pid}')
+                    # Once per id and refetch window, not every refresh.
+                    log = logger.warning if pid in refetched else logger.debug
+                    log(f'No person info found for EmployeeId {pid}')
                     continue
 
                 # Use the *employee_number* for display / images,
@@ -149,11 +232,40 @@ class MonitorG5Client(BaseERPClient):
                     status=True
                 ))
 
+            self._record_refresh(time.perf_counter() - started)
+
             return sorted(workers, key=lambda w: w.name)
 
         except Exception as e:
+            # Raised rather than returning an empty list, so the poller can
+            # retry and keep showing the last known presence.
             logger.error(f'MonitorG5Client error: {e}')
-            return []
+            raise
+
+    def _record_refresh(self, seconds: float) -> None:
+        self._refreshes += 1
+        self._refresh_seconds_total += seconds
+        self._last_refresh_seconds = seconds
+        metrics.ERP_REFRESH_SECONDS.observe(seconds)
+        logger.info(
+            f'Fetched active attendance from Monitor ERP server in '
+            f'{seconds:.2f}s (logins: {self._logins})')
+
+    def _get(self, url: str) -> requests.Response:
+        """ GET on the shared session, re-login once if it has expired. """
+        used_session = self.session_id
+        res = self.session.get(url, timeout=self.timeout)
+
+        if res.status_code in SESSION_EXPIRED_STATUS:
+            with self._login_lock:
+                # The other fetch may already have logged in again.
+                if self.session_id == used_session:
+                    logger.info(
+                        'Monitor ERP session expired, logging in again')
+                    self.authenticate()
+            res = self.session.get(url, timeout=self.timeout)
+
+        return res
 
     @staticmethod
     def _validate_api_url(url: str) -> None:
@@ -180,7 +292,8 @@ class MonitorG5Client(BaseERPClient):
     def _fetch_attendance_chart(self) -> list[dict]:
         """ Fetch real attendance info with EmployeeId + intervals. """
         url = f'{self.api_url}/api/v1/TimeRecording/AttendanceChart'
-        res = self.session.get(url)
+        with metrics.ERP_REQUEST_SECONDS.time(endpoint='attendance'):
+            res = self._get(url)
 
         if DEBUG:
             print('\n=== RAW ATTENDANCE CHART RESPONSE ===')
@@ -190,9 +303,23 @@ class MonitorG5Client(BaseERPClient):
         res.raise_for_status()
         return res.json()
 
+    def _update_persons(self, fetch) -> None:
+        """
+        Updates the persons cache from `fetch()`. If that fails the cached
+        directory is kept, even when stale; only without one it raises.
+        """
+        try:
+            self.persons_cache.update(fetch())
+        except Exception as e:
+            if not self.persons_cache.persons:
+                raise
+            logger.warning(
+                f'Persons fetch failed, using the cached directory: {e}')
+
     def _fetch_persons(self) -> dict[str, dict]:
         url = f'{self.api_url}/api/v1/Common/Persons'
-        res = self.session.get(url)
+        with metrics.ERP_REQUEST_SECONDS.time(endpoint='persons'):
+            res = self._get(url)
 
         if DEBUG:
             print('\n=== RAW PERSONS RESPONSE ===')
@@ -207,8 +334,9 @@ class MonitorG5Client(BaseERPClient):
                 'employee_number': p.get('EmployeeNumber'),
                 'name': f"{p.get('FirstName', '')} "
                         f"{p.get('LastName', '')}".strip(),
-                'location': int(p.get('WarehouseId')),
-                'department': int(p.get('DepartmentId'))
+                'location': (int(p['WarehouseId'])
+                             if p.get('WarehouseId') is not None else None),
+                'department': int(p.get('DepartmentId') or 0)
             }
             for p in data
         }
@@ -0,0 +1,97 @@
+import json
+import os
+import time
+from pathlib import Path
+
+from logger import logger
+
+"""
+PersonsCache
+------------
+
+Keeps the employee directory (names, location and department per person)
+between refreshes, since it changes far less often than attendance does.
+
+The cache is considered fresh for `ttl_seconds` after the last download,
+and is mirrored to a JSON file so a restart does not have to download the
+whole directory again. Clients can ask for the ids they do not know yet,
+so a new hire who clocks in triggers an early refetch instead of waiting
+out the TTL.
+"""
+
+# Smallest gap between two refetches triggered by the same unknown id, so
+# an attendance record without a matching person can't refetch every
+# refresh, while every new hire still triggers one right away.
+MISSING_REFETCH_SECONDS = 300
+
+
+class PersonsCache:
+    def __init__(self, ttl_seconds: float, path: str | Path | None = None
+                 ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.path = Path(path) if path else None
+        self.persons: dict[str, dict] = {}
+        self.fetched_at: float | None = None
+        # Unknown id -> when it last triggered a refetch.
+        self._refetched_for: dict[str, float] = {}
+
+        self._load()
+
+    @property
+    def is_fresh(self) -> bool:
+        if self.fetched_at is None:
+            return False
+        return time.time() - self.fetched_at < self.ttl_seconds
+
+    def missing(self, ids) -> set[str]:
+        """ Returns the ids that are not in the directory. """
+        return {i for i in ids if i not in self.persons}
+
+    def may_refetch_missing(self, ids) -> set[str]:
+        """
+        Returns the unknown `ids` that haven't triggered a refetch within
+        MISSING_REFETCH_SECONDS and remembers them as triggered. A refetch
+        is due when the set isn't empty.
+        """
+        now = time.time()
+        self._refetched_for = {
+            i: at for i, at in self._refetched_for.items()
+            if now - at < MISSING_REFETCH_SECONDS
+        }
+        new = set(ids) - self._refetched_for.keys()
+        for i in new:
+            self._refetched_for[i] = now
+        return new
+
+    def update(self, persons: dict[str, dict]) -> None:
+        self.persons = persons
+        self.fetched_at = time.time()
+        self._save()
+
+    def _load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+
+        try:
+            with open(self.path, mode='r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.persons = data['persons']
+            self.fetched_at = data['fetched_at']
+            logger.info(
+                f'Loaded {len(self.persons)} persons from {self.path}')
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f'Could not read persons cache {self.path}: {e}')
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, mode='w', encoding='utf-8') as f:
+                json.dump({'fetched_at': self.fetched_at,
+                           'persons': self.persons}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f'Could not write persons cache {self.path}: {e}')
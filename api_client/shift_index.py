@@ -0,0 +1,83 @@
+from bisect import bisect_right
+from collections.abc import Hashable, Iterable
+
+"""
+ShiftIndex
+----------
+
+Sorted index of clock-in/clock-out boundaries, built from presence
+intervals. Presence only changes at these boundaries, so the index can
+answer two questions quickly:
+
+- present_at(t):   who is present at time t (bisect + a few deltas)
+- next_change(t):  when the next scheduled change happens (bisect)
+
+Intervals are half-open, a key is present for start <= t < end. Times can
+be anything that sorts, e.g. minutes past midnight or timestamps.
+
+Instead of storing the full set of present keys at every boundary, which
+grows with roster size times boundary count, a full set is stored every
+CHECKPOINT_EVERY boundaries and the arrivals/departures in between are
+replayed on lookup.
+"""
+
+CHECKPOINT_EVERY = 32
+
+
+class ShiftIndex:
+    def __init__(self, intervals: Iterable[tuple[Hashable, object, object]]
+                 ) -> None:
+        arrivals: dict[object, list] = {}
+        departures: dict[object, list] = {}
+
+        for key, start, end in intervals:
+            if not start < end:
+                continue
+            arrivals.setdefault(start, []).append(key)
+            departures.setdefault(end, []).append(key)
+
+        self.boundaries = sorted(arrivals.keys() | departures.keys())
+        self._deltas = [
+            (tuple(arrivals.get(t, ())), tuple(departures.get(t, ())))
+            for t in self.boundaries
+        ]
+
+        # Keys can have several intervals, so presence is counted.
+        self._checkpoints: list[dict] = []
+        counts: dict = {}
+        for i, (arrived, departed) in enumerate(self._deltas):
+            self._apply(counts, arrived, departed)
+            if i % CHECKPOINT_EVERY == 0:
+                self._checkpoints.append(dict(counts))
+
+    def present_at(self, t) -> frozenset:
+        """ Keys present at time t. """
+        i = bisect_right(self.boundaries, t) - 1
+        if i < 0:
+            return frozenset()
+
+        checkpoint = i // CHECKPOINT_EVERY
+        counts = dict(self._checkpoints[checkpoint])
+        for arrived, departed in self._deltas[
+                checkpoint * CHECKPOINT_EVERY + 1:i + 1]:
+            self._apply(counts, arrived, departed)
+
+        return frozenset(counts)
+
+    def next_change(self, t):
+        """ First boundary after t, None if there is none. """
+        i = bisect_right(self.boundaries, t)
+        if i < len(self.boundaries):
+            return self.boundaries[i]
+        return None
+
+    @staticmethod
+    def _apply(counts: dict, arrived: tuple, departed: tuple) -> None:
+        for key in arrived:
+            counts[key] = counts.get(key, 0) + 1
+        for key in departed:
+            remaining = counts.get(key, 0) - 1
+            if remaining > 0:
+                counts[key] = remaining
+            else:
+                counts.pop(key, None)
@@ -0,0 +1,246 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import yaml
+
+import metrics
+from api_client.base_client import BaseERPClient, UsersList
+from logger import logger
+
+try:
+    import psycopg
+except ImportError:  # PostgreSQL support is optional
+    psycopg = None
+
+"""
+SQLClient
+---------
+
+Reads presence straight from a database mirror of the time-clock data,
+which is far cheaper than going through the ERP REST API.
+
+Configured through the `db_*` keys in config.yaml:
+- db_type:      sqlite | postgresql
+- db_name:      database name, or the database file for sqlite
+- db_host, db_port, db_user, db_password: PostgreSQL connection
+- db_locations: only fetch these locations (empty fetches all)
+- db_pool_size: connections kept open between refreshes
+
+A refresh is one query: open attendance intervals (no clock-out, no
+absence code) joined to persons, filtered by location in the database.
+The expected tables are in SCHEMA, including a partial index on open
+intervals so the query stays fast however much history the table holds.
+Subclass and override QUERY to map another schema.
+
+SQLite is opened read-only and is meant for local development and tests.
+PostgreSQL needs psycopg (pip install "psycopg[binary]").
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS persons (
+    id INTEGER PRIMARY KEY,
+    employee_number INTEGER,
+    first_name TEXT NOT NULL DEFAULT '',
+    last_name TEXT NOT NULL DEFAULT '',
+    location_id INTEGER,
+    department_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS attendance (
+    id INTEGER PRIMARY KEY,
+    employee_id INTEGER NOT NULL REFERENCES persons (id),
+    clock_in TIMESTAMP NOT NULL,
+    clock_out TIMESTAMP,
+    absence_code TEXT
+);
+CREATE INDEX IF NOT EXISTS attendance_open_idx
+    ON attendance (employee_id) WHERE clock_out IS NULL;
+CREATE INDEX IF NOT EXISTS persons_location_idx ON persons (location_id);
+"""
+
+QUERY = """
+SELECT DISTINCT p.id, p.employee_number, p.first_name, p.last_name,
+       p.location_id, p.department_id
+FROM attendance a
+JOIN persons p ON p.id = a.employee_id
+WHERE a.clock_out IS NULL
+  AND a.absence_code IS NULL
+"""
+
+DB_TYPES = ('sqlite', 'postgresql')
+
+
+class ConnectionPool:
+    """ Keeps up to `size` open connections for reuse between refreshes. """
+    def __init__(self, connect, size: int = 4) -> None:
+        self.connect = connect
+        self.size = size
+        self.created = 0
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=size)
+
+    @contextmanager
+    def connection(self):
+        """ Borrows a connection, a failing one is closed, not returned. """
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self.connect()
+            self.created += 1
+
+        try:
+            yield conn
+        except Exception:
+            self._close(conn)
+            raise
+
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self._close(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    @staticmethod
+    def _close(conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+class SQLClient(BaseERPClient):
+    QUERY = QUERY
+
+    def __init__(self, config: dict | None = None) -> None:
+        """ Reads config.yaml unless a `config` dict is given. """
+        if config is None:
+            config_path = (Path(__file__).resolve().parent.parent /
+                           'config.yaml')
+            if not config_path.exists():
+                logger.critical(f'Config.yaml not found: {config_path}')
+                raise FileNotFoundError('config.yaml not found')
+            with open(config_path, mode='r', encoding='utf-8') as f:
+                config = yaml.safe_load(f)
+
+        self.db_type = config.get('db_type', '')
+        if self.db_type not in DB_TYPES:
+            logger.critical(f'Invalid db_type: "{self.db_type}"')
+            raise ValueError(
+                f'Invalid db_type "{self.db_type}", expected one of '
+                f'{", ".join(DB_TYPES)}')
+        if self.db_type == 'postgresql' and psycopg is None:
+            raise ImportError(
+                'psycopg is required for PostgreSQL: '
+                'pip install "psycopg[binary]"')
+
+        self.config = config
+        self.timeout = config.get('erp_timeout_seconds', 10)
+        self.locations = [int(loc) for loc in config.get('db_locations', [])]
+        self.pool = ConnectionPool(self._connect,
+                                   size=config.get('db_pool_size', 4))
+        self._sql, self._params = self._build_query()
+
+        self._queries = 0
+        self._last_query_seconds: float | None = None
+        self._lock = threading.Lock()
+
+    def get_workers(self) -> list[UsersList]:
+        """ Currently clocked-in workers, from one query. """
+        started = time.perf_counter()
+
+        try:
+            rows = self._fetch()
+        except Exception as e:
+            logger.error(f'SQLClient error: {e}')
+            raise
+
+        workers = [
+            UsersList(
+                id_number=int(employee_number or pid),
+                name=f'{first_name or ""} {last_name or ""}'.strip(),
+                location=location,
+                department=department or 0,
+                status=True
+            )
+            for pid, employee_number, first_name, last_name, location,
+            department in rows
+        ]
+
+        seconds = time.perf_counter() - started
+        with self._lock:
+            self._queries += 1
+            self._last_query_seconds = seconds
+        metrics.ERP_REFRESH_SECONDS.observe(seconds)
+
+        return sorted(workers, key=lambda w: w.name)
+
+    def stats(self) -> dict:
+        return {
+            'queries': self._queries,
+            'last_query_seconds': self._last_query_seconds,
+            'connections_created': self.pool.created
+        }
+
+    def _fetch(self) -> list[tuple]:
+        # A pooled connection may have been dropped by the server since the
+        # last refresh, so a failure is retried once on a new connection.
+        for attempt in range(2):
+            try:
+                with self.pool.connection() as conn:
+                    with metrics.ERP_REQUEST_SECONDS.time(endpoint='sql'):
+                        cursor = conn.cursor()
+                        try:
+                            cursor.execute(self._sql, self._params)
+                            rows = cursor.fetchall()
+                        finally:
+                            cursor.close()
+                    # Ends the read transaction, the next refresh sees new
+                    # data and PostgreSQL doesn't keep it open meanwhile.
+                    conn.rollback()
+                    return rows
+            except (sqlite3.OperationalError, *self._driver_errors()) as e:
+                if attempt:
+                    raise
+                logger.warning(f'Database query failed, reconnecting: {e}')
+
+    def _build_query(self) -> tuple[str, tuple]:
+        sql = self.QUERY
+        if self.locations:
+            marker = '?' if self.db_type == 'sqlite' else '%s'
+            sql += (f'  AND p.location_id IN '
+                    f'({", ".join([marker] * len(self.locations))})\n')
+        return sql, tuple(self.locations)
+
+    def _connect(self):
+        config = self.config
+        if self.db_type == 'sqlite':
+            path = Path(config.get('db_name', 'onsite')).resolve()
+            # Read-only, a missing file is an error instead of a new empty
+            # database.
+            return sqlite3.connect(f'{path.as_uri()}?mode=ro', uri=True,
+                                   timeout=self.timeout,
+                                   check_same_thread=False)
+
+        return psycopg.connect(
+            host=config.get('db_host', ''),
+            port=config.get('db_port', 5432),
+            dbname=config.get('db_name', 'onsite'),
+            user=config.get('db_user', ''),
+            password=config.get('db_password', ''),
+            connect_timeout=self.timeout,
+            options=f'-c statement_timeout={int(self.timeout * 1000)}'
+        )
+
+    @staticmethod
+    def _driver_errors() -> tuple:
+        if psycopg is None:
+            return ()
+        return (psycopg.OperationalError, psycopg.InterfaceError)
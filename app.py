@@ -1,14 +1,32 @@
+import json
 import urllib3
 import os
+import time
+from datetime import datetime, timezone
 from pathlib import Path
+from urllib.parse import parse_qs
 
 import yaml
-from dash import Dash, html, Output, Input, dcc
-from flask import request
-
-# Change the imported client to match your ERP system.
-from api_client.mock_client import MockERPClient as APIClient
-from logger import logger, access_logger
+from dash import Dash, html, Output, Input, State, dcc, Patch, ctx, \
+    no_update
+from flask import Response, request, send_file
+
+import metrics
+from api_client import create_client
+from card_cache import CardCache
+from compression import compress_response, negotiate
+from image_index import ImageIndex
+from logger import logger, access_logger, configure as configure_logging
+from paging import DepartmentHeading, page_count, page_items
+from paths import data_path
+from presence import PresencePoller, PresenceSnapshot
+from presence_changes import ChangeFeed
+from presence_export import FORMATS, PresenceExport, worker_fields
+from presence_history import PresenceHistory
+from push import PushStreams
+from resilience import OPEN, CircuitBreaker
+from static_assets import IMMUTABLE_MAX_AGE, StaticAssets
+from thumbnails import ThumbnailCache
 
 __version__ = '1.1.4'
 
@@ -26,10 +44,18 @@ present on-site is critical for safety, evacuation, and visibility.
 
 Supports:
 - Real-time auto-refresh of presence data
-- Location-based filtering (Factory, Office, Remote)
-- Configurable ERP client (mock, Monitor G5, etc.)
+- Location-based filtering (Factory, Office, Remote), per kiosk through
+  the URL, e.g. /?location=2 or /?location=2&department=5
+- Configurable ERP client (mock, Monitor G5, etc.) via `erp_client`
 - Responsive UI with image fallback handling
+- Large-roster mode: one page of cards at a time, rotating every
+  `page_seconds`, optionally grouped by department
 - Kiosk mode and production deployment (via Waitress)
+- Compressed responses, content-hashed asset URLs cached by the browser
+- Roll-call lists on /api/presence (JSON) and /api/presence.csv, with the
+  same location/department query as the kiosks
+- Change feed for other systems on /api/presence/changes?since=<version>
+- Prometheus-style metrics on /metrics (when `metrics_enabled` is set)
 
 Configuration is managed via `config.yaml`, generated automatically
 on first launch if missing. Employee images are loaded from the path
@@ -48,25 +74,73 @@ DEFAULT_CONFIG = {
     'app_title': 'OnSitePresence Monitor',
     'header_mode': 'both',  # text | logo | both
     'worker_card_mode': 'image_name',  # image_name | name_only | name_logo
+    'card_cache_size': 2048,  # 0 builds every card on every refresh
+    'page_size': 0,  # cards per page, 0 shows everyone (or ?page_size=)
+    'page_seconds': 15,
+    'page_group_departments': False,
+    'department_names': {},  # department id: heading
     'company_logo': 'assets/logo.png',
     'update_interval_seconds': 30,
+    'erp_poll_seconds': 30,
+    'erp_poll_min_seconds': 10,
+    'erp_poll_max_seconds': 300,
+    'erp_retries': 2,
+    'erp_backoff_seconds': 1,
+    'erp_backoff_max_seconds': 30,
+    'erp_breaker_failures': 3,
+    'erp_breaker_cooldown_seconds': 120,
+    'snapshot_file': 'data/presence_snapshot.json',
+    'history_file': 'data/presence_history.db',  # '' disables history
+    'history_retention_days': 90,
+    'history_checkpoint_seconds': 3600,
+    'changes_buffer_size': 256,  # versions served by /api/presence/changes
+    'push_updates': True,
+    'push_max_streams': 32,
+    'push_keepalive_seconds': 15,
+    'push_stream_seconds': 300,
     'image_directory': 'assets/employee_images/',
     'department_logo_directory': 'assets/department_logos/',
+    'image_rescan_seconds': 60,
+    'image_sweep_seconds': 3600,  # picks up photos replaced in place
+    'thumbnail_size': 256,  # 0 serves the original images
+    'thumbnail_directory': 'data/thumbnails/',
+    'thumbnail_max_age_seconds': 604800,
+    'erp_client': 'mock',  # mock | monitor_g5 | sql | package.module:Class
     'erp_api_url': 'https://{host}:8001/{languageCode}/{companyNumber}/',
     'erp_api_user': '',
     'erp_api_key': '',
     'erp_api_client': '',
     'erp_api_secret': '',
+    'erp_timeout_seconds': 10,
+    'persons_cache_ttl_seconds': 3600,
+    'persons_cache_file': 'data/persons_cache.json',
     'db_type': '',
     'db_host': '',
     'db_port': 5432,
     'db_name': 'onsite',
     'db_user': 'user',
     'db_password': 'password',
+    'db_locations': [],  # empty fetches every location
+    'db_pool_size': 4,
     'jwt_secret': '',
     'location': 1,
     'jwt_algo': 'HS256',
-    'message_no_workers': 'No one is currently clocked in'
+    'log_queue': True,
+    'access_log_window_seconds': 60,  # 0 logs every kiosk refresh
+    'server_host': '0.0.0.0',
+    'server_port': 8050,
+    'server_threads': 4,  # push streams get their own on top
+    'server_connection_limit': 100,
+    'server_channel_timeout_seconds': 120,
+    'server_backlog': 1024,
+    'compress_responses': True,  # gzip, and brotli when installed
+    'compress_min_bytes': 1024,
+    'metrics_enabled': False,
+    'metrics_kiosk_window_seconds': 360,
+    'message_no_workers': 'No one is currently clocked in',
+    'message_loading': 'Loading presence data...',
+    'message_stale': 'Showing presence from {time} - waiting for ERP',
+    'message_department': 'Department {department}'
 }
 
 
@@ -82,15 +156,121 @@ def load_config(path='config.yaml') -> dict:
 
 
 CONFIG = load_config()
+configure_logging(
+    use_queue=CONFIG.get('log_queue', True),
+    access_window_seconds=CONFIG.get('access_log_window_seconds', 60)
+)
+metrics.configure(CONFIG.get('metrics_enabled', False))
 UPDATE_INTERVAL = CONFIG['update_interval_seconds'] * 1000  # Convert to ms
 IMAGE_DIRECTORY = CONFIG['image_directory']
 LOCATION = CONFIG['location']
 MESSAGE_NO_WORKERS = CONFIG['message_no_workers']
+MESSAGE_LOADING = CONFIG.get('message_loading', 'Loading presence data...')
+MESSAGE_STALE = CONFIG.get(
+    'message_stale', 'Showing presence from {time} - waiting for ERP')
+ERP_POLL_SECONDS = CONFIG.get('erp_poll_seconds',
+                              CONFIG['update_interval_seconds'])
 APP_TITLE = CONFIG['app_title']
+PAGE_SIZE = CONFIG.get('page_size', 0)
+PAGE_SECONDS = CONFIG.get('page_seconds', 15)
+GROUP_DEPARTMENTS = CONFIG.get('page_group_departments', False)
+DEPARTMENT_NAMES = CONFIG.get('department_names') or {}
+MESSAGE_DEPARTMENT = CONFIG.get('message_department',
+                                'Department {department}')
 JPEG_WEBP = ('.png', '.jpg', '.jpeg', '.webp')
 
-erp_client = APIClient()
+erp_client = create_client(CONFIG.get('erp_client', 'mock'))
+presence_poller = PresencePoller(
+    erp_client,
+    ERP_POLL_SECONDS,
+    min_seconds=CONFIG.get('erp_poll_min_seconds', 10),
+    max_seconds=CONFIG.get('erp_poll_max_seconds', 300),
+    retries=CONFIG.get('erp_retries', 2),
+    backoff_seconds=CONFIG.get('erp_backoff_seconds', 1),
+    backoff_max_seconds=CONFIG.get('erp_backoff_max_seconds', 30),
+    breaker=CircuitBreaker(
+        failure_threshold=CONFIG.get('erp_breaker_failures', 3),
+        cooldown_seconds=CONFIG.get('erp_breaker_cooldown_seconds', 120)
+    ),
+    store_path=data_path(CONFIG.get('snapshot_file',
+                                    'data/presence_snapshot.json')),
+    # Kiosks keep their rendered version across server restarts, so
+    # versions continue from the boot time instead of starting over.
+    initial_version=int(time.time())
+)
+HISTORY_FILE = data_path(CONFIG.get('history_file',
+                                    'data/presence_history.db'))
+presence_history = PresenceHistory(
+    HISTORY_FILE,
+    retention_days=CONFIG.get('history_retention_days', 90),
+    checkpoint_seconds=CONFIG.get('history_checkpoint_seconds', 3600)
+) if HISTORY_FILE else None
+if presence_history is not None:
+    presence_poller.add_listener(presence_history.record)
+push_streams = PushStreams(
+    presence_poller,
+    max_streams=CONFIG.get('push_max_streams', 32),
+    keepalive_seconds=CONFIG.get('push_keepalive_seconds', 15),
+    duration_seconds=CONFIG.get('push_stream_seconds', 300)
+)
+PUSH_UPDATES = CONFIG.get('push_updates', True)
+presence_export = PresenceExport()
+change_feed = ChangeFeed(presence_poller.snapshot,
+                         size=CONFIG.get('changes_buffer_size', 256))
+presence_poller.add_listener(change_feed.record)
+image_index = ImageIndex(
+    IMAGE_DIRECTORY,
+    default='assets/default.png',
+    extensions=JPEG_WEBP,
+    rescan_seconds=CONFIG.get('image_rescan_seconds', 60),
+    sweep_seconds=CONFIG.get('image_sweep_seconds', 3600)
+)
+thumbnail_cache = ThumbnailCache(
+    data_path(CONFIG.get('thumbnail_directory', 'data/thumbnails/')),
+    size=CONFIG.get('thumbnail_size', 256)
+)
+THUMBNAIL_MAX_AGE = CONFIG.get('thumbnail_max_age_seconds', 604800)
+department_logo_index = ImageIndex(
+    CONFIG['department_logo_directory'],
+    default='assets/default_dept.png',
+    extensions=JPEG_WEBP,
+    partial=False,
+    rescan_seconds=CONFIG.get('image_rescan_seconds', 60),
+    sweep_seconds=CONFIG.get('image_sweep_seconds', 3600)
+)
+# The card functions are defined further down, hence the lambdas.
+card_cache = CardCache(
+    lambda worker: build_worker_card(worker),
+    generation=lambda: card_generation(),
+    max_size=CONFIG.get('card_cache_size', 2048)
+)
+# Kiosks on the push stream only call back on changes, so the window must
+# cover a full stream (push_stream_seconds), not just the update interval.
+active_kiosks = metrics.ActiveClients(
+    CONFIG.get('metrics_kiosk_window_seconds', 360))
+metrics.SNAPSHOT_AGE_SECONDS.set_function(
+    lambda: presence_poller.snapshot.age_seconds)
+metrics.SNAPSHOT_STALE.set_function(
+    lambda: int(presence_poller.snapshot.stale))
+metrics.ACTIVE_KIOSKS.set_function(active_kiosks.count)
+metrics.PUSH_STREAMS.set_function(lambda: push_streams.active)
+metrics.ERP_RETRIES.set_function(lambda: presence_poller.retry_count)
+metrics.ERP_FAILURES.set_function(lambda: presence_poller.failure_count)
+metrics.ERP_BREAKER_OPEN.set_function(
+    lambda: int(presence_poller.breaker.state == OPEN))
+COMPRESS_RESPONSES = CONFIG.get('compress_responses', True)
+COMPRESS_MIN_BYTES = CONFIG.get('compress_min_bytes', 1024)
+ASSETS_URL = '/assets/'
+static_assets = StaticAssets('assets', url_path=ASSETS_URL)
+logger.info(f'Static assets hashed and compressed: {static_assets.build()}')
+# Stylesheets and scripts are linked with their content hash instead of
+# Dash's modification time (still served by Dash if requested directly).
 app = Dash(title=APP_TITLE,
+           assets_ignore=r'\.(css|js)$',
+           external_stylesheets=[
+               static_assets.url(p) for p in static_assets.files('.css')],
+           external_scripts=[
+               static_assets.url(p) for p in static_assets.files('.js')],
            meta_tags=[
                {'name': 'viewport', 'content':
                    'width=device-width, initial-scale=1'},
@@ -108,7 +288,7 @@ app.index_string = """
         <title>{%title%}</title>
         {%favicon%}
         {%css%}
-        <link rel="apple-touch-icon" href="/assets/apple-touch-icon.png">
+        <link rel="apple-touch-icon" href="{apple_touch_icon}">
     </head>
     <body>
         {%app_entry%}
@@ -119,7 +299,8 @@ app.index_string = """
         </footer>
     </body>
 </html>
-"""
+""".replace('{apple_touch_icon}',
+           static_assets.url('assets/apple-touch-icon.png'))
 
 
 def render_header() -> html.Div | html.H2:
@@ -128,14 +309,15 @@ def render_header() -> html.Div | html.H2:
 
     if mode == 'logo' and logo and os.path.exists(logo):
         return html.Div(
-            html.Img(src=logo, className='header-logo'),
+            html.Img(src=static_assets.url(logo), className='header-logo'),
             className='header'
         )
 
     if mode == 'both' and logo and os.path.exists(logo):
         return html.Div(
             [
-                html.Img(src=logo, className='header-logo'),
+                html.Img(src=static_assets.url(logo),
+                         className='header-logo'),
                 html.H2(APP_TITLE)
             ],
             className='header'
@@ -146,73 +328,383 @@ def render_header() -> html.Div | html.H2:
 
 
 app.layout = html.Div([
+    dcc.Location(id='url', refresh=False),
     render_header(),
     dcc.Interval(id='update-interval', interval=UPDATE_INTERVAL,
                  n_intervals=0),
-    html.Div(id='worker-container', className='dashboard-container')
+    # Rotates the pages, enabled by the callback when there is more than one.
+    dcc.Interval(id='page-interval', interval=PAGE_SECONDS * 1000,
+                 disabled=True),
+    # Snapshot version and URL query currently shown by this browser, used
+    # for diffing.
+    dcc.Store(id='rendered-version'),
+    # Latest version announced by the push stream (assets/push.js).
+    dcc.Store(id='presence-push'),
+    # Page currently shown by this browser.
+    dcc.Store(id='rendered-page'),
+    html.Div(id='presence-status'),
+    html.Div(id='worker-container', className='dashboard-container'),
+    html.Div(id='page-indicator', className='page-indicator')
 ])
 
 
 def get_image_path(worker_id: int) -> str:
-    """ Returns the absolute path to a worker image. """
-    base = Path(IMAGE_DIRECTORY)
+    """ Returns the path to a worker image, or the default image. """
+    path = image_index.lookup(worker_id)
+    if metrics.enabled:
+        metrics.IMAGE_LOOKUPS.inc(
+            index='employee',
+            result='miss' if path == image_index.default else 'hit')
+    return path
+
+
+def get_card_image_url(worker_id: int) -> str:
+    """
+    Returns the card image URL, a thumbnail when Pillow is available,
+    versioned with the stamp of the photo from the image index (no I/O).
+    """
+    path = get_image_path(worker_id)
+    if not thumbnail_cache.available:
+        return static_assets.url(path, image_index.stamp(path))
+
+    stamp = image_index.stamp(path)
+    if stamp is None:
+        return f'thumbnails/{worker_id}'
+    return f'thumbnails/{worker_id}?v={stamp}'
+
+
+@server.route('/thumbnails/<key>')
+def serve_thumbnail(key: str):
+    # Only worker ids, and only paths from the image index (or the default
+    # image) are served.
+    if not (key.isascii() and key.isdigit()):
+        return Response(status=404)
+    image_path = get_image_path(key)
+    source = os.path.abspath(image_path)
+
+    if not thumbnail_cache.available:
+        return send_file(source, max_age=THUMBNAIL_MAX_AGE)
+
+    accepts_webp = 'image/webp' in request.headers.get('Accept', '')
 
     try:
-        for ext in JPEG_WEBP:
-            candidates = base / f'{worker_id}{ext}'
-            if candidates.exists():
-                return str(candidates)
+        path, digest = thumbnail_cache.get(
+            source, 'webp' if accepts_webp else 'png')
+    except (OSError, ValueError) as e:
+        logger.warning(f'Thumbnail failed for {source}: {e}')
+        return send_file(source, max_age=THUMBNAIL_MAX_AGE)
+
+    fmt = path.suffix.lstrip('.')
+    response = send_file(
+        path,
+        mimetype=f'image/{fmt}',
+        etag=f'{digest}-{fmt}',
+        max_age=THUMBNAIL_MAX_AGE
+    )
+    response.vary.add('Accept')
+    stamp = image_index.stamp(image_path)
+    if stamp is not None and request.args.get('v') == stamp:
+        set_immutable(response)
+    return response
+
+
+@server.before_request
+def serve_static_asset():
+    """ Assets precompressed, and cached for good on the current hash. """
+    if (request.method not in ('GET', 'HEAD') or
+            not request.path.startswith(ASSETS_URL)):
+        return None
+
+    asset = static_assets.get(request.path[len(ASSETS_URL):])
+    if asset is None:
+        return None  # Dash answers with a 404
+
+    if asset.bodies:
+        encoding = negotiate(request.accept_encodings, asset.bodies)
+        response = Response(asset.bodies[encoding], mimetype=asset.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        if len(asset.bodies) > 1:
+            response.vary.add('Accept-Encoding')
+        response.set_etag(f'{asset.digest}-{encoding}')
+        response.make_conditional(request)
+    else:
+        response = send_file(asset.path, mimetype=asset.mimetype,
+                             etag=asset.digest)
 
-        for file in base.iterdir():
-            if (file.stem == str(worker_id) and
-                    file.suffix.lower() in JPEG_WEBP):
-                return str(file)  # Checks for perfect match
-            elif (str(worker_id) in file.stem and
-                  file.suffix.lower() in JPEG_WEBP):
-                return str(file)  # Checks for partial match
+    if request.args.get('v') == asset.digest:
+        set_immutable(response)
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def set_immutable(response: Response) -> None:
+    """ For URLs with a content hash, a new file gets a new URL. """
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+
+
+@server.route('/api/presence/stream')
+def presence_stream():
+    if not PUSH_UPDATES:
+        # 204 tells EventSource not to reconnect, kiosks keep polling.
+        return Response(status=204)
+
+    presence_poller.start()
+    active_kiosks.seen(request.headers.get('X-Forwarded-For',
+                                           request.remote_addr),
+                       request.headers.get('User-Agent', 'Unknown'))
+    stream = push_streams.open()
+    if stream is None:
+        logger.warning(
+            f'Push stream limit reached ({push_streams.max_streams}), '
+            f'kiosk falls back to polling')
+        return Response(status=204)
+
+    return Response(
+        stream,
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
 
-    except (FileNotFoundError, PermissionError, OSError):
-        pass  # Network share offline, permission error, etc.
 
-    # Fallback default
-    return 'assets/default.png'
+@server.route('/api/presence')
+@server.route('/api/presence.<fmt>')
+def export_presence(fmt: str = 'json'):
+    if fmt not in FORMATS:
+        return Response(status=404)
+
+    presence_poller.start()
+    snapshot = presence_poller.snapshot
+    if snapshot.fetched_at is None:
+        # An empty list could be read as "everyone is out".
+        return Response('Presence not loaded yet', status=503,
+                        mimetype='text/plain', headers={'Retry-After': '5'})
+
+    etag = f'{snapshot.version}-{fmt}'
+    # Weak comparison, compressed responses carry a weak ETag.
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        view = parse_view(request.query_string.decode())
+        response = Response(
+            presence_export.get(snapshot, view, fmt),
+            mimetype='text/csv' if fmt == 'csv' else 'application/json')
+
+    response.set_etag(etag)
+    response.last_modified = datetime.fromtimestamp(snapshot.fetched_at,
+                                                    tz=timezone.utc)
+    # Phones revalidate every time, which costs a 304 at most.
+    response.cache_control.no_cache = True
+    if snapshot.stale:
+        response.headers['X-Presence-Stale'] = 'true'
+    return response
+
+
+@server.route('/api/presence/changes')
+def presence_changes():
+    since = request.args.get('since')
+    try:
+        since = int(since) if since is not None else None
+    except ValueError:
+        return Response('since must be a version number', status=400,
+                        mimetype='text/plain')
+
+    presence_poller.start()
+    if presence_poller.snapshot.fetched_at is None:
+        return Response('Presence not loaded yet', status=503,
+                        mimetype='text/plain', headers={'Retry-After': '5'})
+
+    result = change_feed.changes(
+        since, *parse_view(request.query_string.decode()))
+    for key in ('workers', 'arrivals', 'departures', 'updated'):
+        if key in result:
+            result[key] = [worker_fields(w) for w in result[key]]
+
+    response = Response(json.dumps(result, separators=(',', ':')),
+                        mimetype='application/json')
+    response.cache_control.no_cache = True
+    return response
+
+
+@server.route('/metrics')
+def serve_metrics():
+    if not metrics.enabled:
+        return Response(status=404)
+    return Response(metrics.render(),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@server.after_request
+def record_callback_bytes(response: Response) -> Response:
+    if (metrics.enabled and request.path.endswith('_dash-update-component')
+            and response.content_length is not None):
+        metrics.CALLBACK_RESPONSE_BYTES.observe(response.content_length)
+    return response
+
+
+# Registered after record_callback_bytes, so it runs first and the
+# metric sees the compressed size.
+@server.after_request
+def compress(response: Response) -> Response:
+    if not COMPRESS_RESPONSES:
+        return response
+    return compress_response(response, request.accept_encodings,
+                             min_bytes=COMPRESS_MIN_BYTES)
 
 
 def get_department_logo(department: str) -> str:
-    base = Path(CONFIG['department_logo_directory'])
+    """ Returns the path to a department logo, or the default logo. """
     if not department:
-        return 'assets/default_dept.png'
+        return department_logo_index.default
+
+    path = department_logo_index.lookup(department)
+    if metrics.enabled:
+        metrics.IMAGE_LOOKUPS.inc(
+            index='department',
+            result='miss' if path == department_logo_index.default else 'hit')
+    return path
+
+
+def parse_view(search: str | None) -> tuple[str | None, str | None]:
+    """
+    Returns the (location, department) a kiosk asked for in its URL query.
+    Location defaults to the configured one, `location=all` shows every
+    location. Department is optional.
+    """
+    query = parse_qs((search or '').lstrip('?'))
+    location = query.get('location', [LOCATION])[0]
+    department = query.get('department', [None])[0]
+
+    if str(location).lower() == 'all':
+        location = None
+    return location, department
+
+
+def parse_page_size(search: str | None) -> int:
+    """ Cards per page for a kiosk, `page_size` in the URL or the config. """
+    query = parse_qs((search or '').lstrip('?'))
+    try:
+        return max(int(query.get('page_size', [PAGE_SIZE])[0]), 0)
+    except ValueError:
+        return PAGE_SIZE
 
-    for ext in JPEG_WEBP:
-        p = base / f'{department}{ext}'
-        if p.exists():
-            return str(p)
 
-    return 'assets/default_dept.png'
+def render_workers(snapshot: PresenceSnapshot | None = None,
+                   view: tuple = (LOCATION, None), page: int = 0,
+                   page_size: int = 0) -> list[html.Div] | html.Div:
+    if snapshot is None:
+        snapshot = presence_poller.snapshot
 
+    if snapshot.fetched_at is None:
+        return html.Div(MESSAGE_LOADING, className='empty-message')
 
-def render_workers() -> list[html.Div] | html.Div:
-    active_workers = [w for w in erp_client.get_workers() if
-                      w.status and w.location == LOCATION]
-    logger.info(f'Active workers updated: {len(active_workers)}')
+    active_workers = snapshot.view(*view)
 
     if not active_workers:
         return html.Div(MESSAGE_NO_WORKERS, className='empty-message')
 
-    return [
-        render_worker_card(worker)
-        for worker in active_workers
-    ]
+    with metrics.RENDER_WORKERS_SECONDS.time():
+        return [
+            render_worker_card(item)
+            for item in page_items(active_workers, page, page_size,
+                                   GROUP_DEPARTMENTS)
+        ]
+
+
+def render_status(snapshot: PresenceSnapshot) -> html.Div | str:
+    """ Banner shown while the ERP is unavailable. """
+    if not snapshot.stale:
+        return ''
+
+    since = (format_fetched_at(snapshot.fetched_at)
+             if snapshot.fetched_at else '-')
+    return html.Div(MESSAGE_STALE.format(time=since), className='stale-banner')
+
+
+def format_fetched_at(ts: float) -> str:
+    """ Time of day, with the date when it wasn't today. """
+    fetched = datetime.fromtimestamp(ts)
+    if fetched.date() == datetime.now().date():
+        return fetched.strftime('%H:%M')
+    return fetched.strftime('%d.%m %H:%M')
+
+
+def card_key(worker) -> tuple:
+    """ Identifies a rendered card, a changed key means a changed card. """
+    if isinstance(worker, DepartmentHeading):
+        return 'department', worker.department
+    return worker.id_number, worker.name, worker.department
+
+
+def diff_workers(previous: tuple, current: tuple) -> Patch | None:
+    """
+    Returns a Patch that turns the cards of the `previous` workers into the
+    cards of the `current` workers by removing and inserting cards only.
+    Returns None when a full render is needed instead (empty message shown
+    before or after, or the remaining cards changed order).
+    """
+    if not previous or not current:
+        return None
+
+    old_keys = [card_key(w) for w in previous]
+    new_keys = [card_key(w) for w in current]
+    old_set = set(old_keys)
+    new_set = set(new_keys)
+
+    kept = [k for k in old_keys if k in new_set]
+    if kept != [k for k in new_keys if k in old_set]:
+        return None
+
+    patch = Patch()
+
+    # Remove from the end so earlier indexes stay valid.
+    for index in reversed(range(len(old_keys))):
+        if old_keys[index] not in new_set:
+            del patch[index]
+
+    # Insert in final order, everything before `index` is already in place.
+    for index, worker in enumerate(current):
+        if new_keys[index] not in old_set:
+            patch.insert(index, render_worker_card(worker))
+
+    return patch
+
+
+def card_generation() -> tuple:
+    """ Everything besides the worker a card depends on. """
+    return (CONFIG.get('worker_card_mode', 'image_name'),
+            image_index.version, department_logo_index.version)
 
 
 def render_worker_card(worker) -> html.Div:
+    """ Card for a worker, reused while the worker and settings match. """
+    if isinstance(worker, DepartmentHeading):
+        return render_department_heading(worker.department)
+    return card_cache.get(card_key(worker), worker)
+
+
+def render_department_heading(department) -> html.Div:
+    name = DEPARTMENT_NAMES.get(department,
+                                DEPARTMENT_NAMES.get(str(department)))
+    return html.Div(name or MESSAGE_DEPARTMENT.format(department=department),
+                    className='department-heading')
+
+
+def build_worker_card(worker) -> html.Div:
     mode = CONFIG.get('worker_card_mode', 'image_name')
 
     children = []
 
     if mode == 'image_name':
         children.extend([
-            html.Img(src=get_image_path(worker.id_number)),
+            html.Img(src=get_card_image_url(worker.id_number)),
             html.P(worker.name)
         ])
 
@@ -226,9 +718,11 @@ def render_worker_card(worker) -> html.Div:
         )
 
     elif mode == 'name_logo':
+        logo = get_department_logo(worker.department)
         children.extend([
             html.Img(
-                src=get_department_logo(worker.department),
+                src=static_assets.url(
+                    logo, department_logo_index.stamp(logo)),
                 className='dept_logo'
             ),
             html.P(worker.name)
@@ -243,10 +737,21 @@ def render_worker_card(worker) -> html.Div:
 
 @app.callback(
     Output('worker-container', 'children'),
-    Input('update-interval', 'n_intervals'))
-def update_worker_cards(_):
+    Output('presence-status', 'children'),
+    Output('rendered-version', 'data'),
+    Output('rendered-page', 'data'),
+    Output('page-indicator', 'children'),
+    Output('page-interval', 'disabled'),
+    Input('update-interval', 'n_intervals'),
+    Input('presence-push', 'data'),
+    Input('page-interval', 'n_intervals'),
+    Input('url', 'search'),
+    State('rendered-version', 'data'),
+    State('rendered-page', 'data'))
+def update_worker_cards(_, __, ___, search, rendered, rendered_page):
     client_ip = request.headers.get('X-Forwarded-For', request.remote_addr)
     user_agent = request.headers.get('User-Agent', 'Unknown')
+    active_kiosks.seen(client_ip, user_agent)
 
     access_logger.info(
         'refresh',
@@ -257,7 +762,50 @@ def update_worker_cards(_):
         }
     )
 
-    return render_workers()
+    # The poller is started lazily so that importing the app (tests, the
+    # debug reloader parent) never spawns a thread that talks to the ERP.
+    presence_poller.start()
+    image_index.start()
+    department_logo_index.start()
+
+    snapshot = presence_poller.snapshot
+    rotate = ctx.triggered_id == 'page-interval'
+    rendered = rendered or {}
+    if rendered.get('search') != search:
+        # Shown for another query (or nothing yet), start over.
+        rendered, rendered_page = {}, None
+    rendered_version = rendered.get('version')
+    shown = {'version': snapshot.version, 'search': search}
+
+    if rendered_version == snapshot.version and not rotate:
+        return (no_update,) * 6
+
+    view = parse_view(search)
+    page_size = parse_page_size(search)
+    workers = snapshot.view(*view)
+    pages = page_count(len(workers), page_size)
+    page = ((rendered_page or 0) + rotate) % pages
+    if rendered_version == snapshot.version and page == rendered_page:
+        return (no_update,) * 6  # A single page, nothing to rotate
+
+    status = render_status(snapshot)
+    paging = (page, f'{page + 1} / {pages}' if pages > 1 else '', pages == 1)
+    previous = presence_poller.get_version(rendered_version)
+    if (page == rendered_page and previous is not None and
+            previous.fetched_at is not None):
+        old_items = page_items(previous.view(*view), page, page_size,
+                               GROUP_DEPARTMENTS)
+        new_items = page_items(workers, page, page_size, GROUP_DEPARTMENTS)
+        if old_items == new_items:
+            # Presence changed elsewhere, not on this kiosk's page.
+            return no_update, status, shown, *paging
+
+        patch = diff_workers(old_items, new_items)
+        if patch is not None:
+            return patch, status, shown, *paging
+
+    return (render_workers(snapshot, view, page, page_size), status, shown,
+            *paging)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,72 @@
+/*
+ * Presence push (Server-Sent Events)
+ *
+ * Listens on /api/presence/stream and triggers the worker card update the
+ * moment the server's presence snapshot changes. While the stream is up
+ * the regular polling interval is paused. If the stream can't be opened or
+ * goes quiet, the interval is resumed and a reconnect is tried later.
+ */
+(function () {
+    if (!window.EventSource) {
+        return;  // Interval polling only
+    }
+
+    var RECONNECT_MS = 60000;
+    var source = null;
+    var watchdog = null;
+
+    function setProps(id, props) {
+        var dc = window.dash_clientside;
+        if (dc && dc.set_props) {
+            try {
+                dc.set_props(id, props);
+            } catch (e) {
+                // Layout not rendered yet, the interval covers it.
+            }
+        }
+    }
+
+    function fallback() {
+        clearTimeout(watchdog);
+        if (source) {
+            source.close();
+            source = null;
+        }
+        setProps('update-interval', {disabled: false});
+        setTimeout(connect, RECONNECT_MS);
+    }
+
+    function alive(keepaliveSeconds) {
+        setProps('update-interval', {disabled: true});
+        clearTimeout(watchdog);
+        watchdog = setTimeout(fallback, keepaliveSeconds * 3000);
+    }
+
+    function connect() {
+        var keepalive = 15;
+        source = new EventSource('api/presence/stream');
+
+        source.addEventListener('hello', function (event) {
+            keepalive = JSON.parse(event.data).keepalive;
+            alive(keepalive);
+        });
+        source.addEventListener('presence', function (event) {
+            setProps('presence-push', {data: JSON.parse(event.data)});
+            alive(keepalive);
+        });
+        source.addEventListener('ping', function () {
+            alive(keepalive);
+        });
+        source.onerror = function () {
+            // EventSource retries by itself while CONNECTING, CLOSED means
+            // the server refused the stream.
+            if (source && source.readyState === EventSource.CLOSED) {
+                fallback();
+            } else {
+                setProps('update-interval', {disabled: false});
+            }
+        };
+    }
+
+    connect();
+})();
@@ -0,0 +1,300 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+if __package__ in (None, ''):
+    # Allow `python benchmarks/bench_refresh.py` from the repository root.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api_client.monitor_g5_client import MonitorG5Client
+from benchmarks.fake_g5_server import FakeG5Server, make_roster
+
+"""
+Refresh benchmark
+-----------------
+
+Measures the refresh path end to end against a local fake Monitor G5
+server, for a range of roster sizes:
+
+- get_workers_cold:    new client, login + Persons + AttendanceChart
+- get_workers_warm:    Persons cached, AttendanceChart only
+- render_workers:      building the cards of the whole roster
+- callback_full:       Dash callback for a kiosk that has nothing rendered
+- callback_patch:      Dash callback after one worker clocked out
+- callback_unchanged:  Dash callback when nothing changed
+
+Timings are collected without tracing, then each step runs once more under
+`tracemalloc` to record its peak allocation. Results are written as JSON,
+and can be compared against an earlier run to catch regressions:
+
+    python benchmarks/bench_refresh.py
+    python benchmarks/bench_refresh.py --sizes 100 1000 --latency 0.05
+    python benchmarks/bench_refresh.py --compare benchmarks/results/old.json
+"""
+
+DEFAULT_SIZES = (100, 1000, 10000, 50000)
+RESULTS_DIRECTORY = Path(__file__).resolve().parent / 'results'
+
+# Passes URL validation, the fake server URL is set on the client after.
+BENCH_CONFIG = {
+    'erp_api_url': 'https://localhost:8001/no/001.1/',
+    'erp_api_user': 'bench',
+    'erp_api_key': 'bench',
+    'erp_timeout_seconds': 60,
+    'persons_cache_file': ''
+}
+
+
+def summarize(samples: list[float]) -> dict:
+    """ Min, median, p95, p99, max and mean of a list of timings. """
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        'runs': len(ordered),
+        'min': ordered[0],
+        'median': pick(0.5),
+        'p95': pick(0.95),
+        'p99': pick(0.99),
+        'max': ordered[-1],
+        'mean': sum(ordered) / len(ordered)
+    }
+
+
+def peak_memory(step) -> int:
+    """ Peak bytes allocated while running `step` once. """
+    tracemalloc.start()
+    try:
+        step()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def callback_body(rendered_version, search: str = '?location=all',
+                  rendered_page=None, rotate: bool = False) -> dict:
+    """ Request body the kiosk sends for `update_worker_cards`. """
+    rendered = (None if rendered_version is None else
+                {'version': rendered_version, 'search': search})
+    return {
+        'output': '..worker-container.children...presence-status.children'
+                  '...rendered-version.data...rendered-page.data'
+                  '...page-indicator.children...page-interval.disabled..',
+        'outputs': [
+            {'id': 'worker-container', 'property': 'children'},
+            {'id': 'presence-status', 'property': 'children'},
+            {'id': 'rendered-version', 'property': 'data'},
+            {'id': 'rendered-page', 'property': 'data'},
+            {'id': 'page-indicator', 'property': 'children'},
+            {'id': 'page-interval', 'property': 'disabled'}
+        ],
+        'inputs': [
+            {'id': 'update-interval', 'property': 'n_intervals', 'value': 1},
+            {'id': 'presence-push', 'property': 'data', 'value': None},
+            {'id': 'page-interval', 'property': 'n_intervals', 'value': None},
+            {'id': 'url', 'property': 'search', 'value': search}
+        ],
+        'state': [
+            {'id': 'rendered-version', 'property': 'data',
+             'value': rendered},
+            {'id': 'rendered-page', 'property': 'data',
+             'value': rendered_page}
+        ],
+        'changedPropIds': ['page-interval.n_intervals' if rotate
+                           else 'update-interval.n_intervals']
+    }
+
+
+def new_client(url: str) -> MonitorG5Client:
+    client = MonitorG5Client(BENCH_CONFIG)
+    client.api_url = url
+    return client
+
+
+def bench_size(app, size: int, repeat: int, latency: float) -> dict:
+    persons, attendance = make_roster(size)
+    poller = app.presence_poller
+    http = app.server.test_client()
+
+    with FakeG5Server(persons, attendance, latency=latency) as server:
+        def time_step(step) -> list[float]:
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                step()
+                samples.append(time.perf_counter() - started)
+            return samples
+
+        def call(rendered_version):
+            response = http.post('/_dash-update-component',
+                                 json=callback_body(rendered_version))
+            if response.status_code != 200:
+                raise RuntimeError(
+                    f'Callback failed with HTTP {response.status_code}')
+            return response
+
+        results = {'roster_size': size}
+
+        results['get_workers_cold'] = time_step(
+            lambda: new_client(server.url).get_workers())
+
+        client = new_client(server.url)
+        client.get_workers()
+        results['get_workers_warm'] = time_step(client.get_workers)
+
+        poller.client = client
+        snapshot = poller.refresh()
+        results['present'] = len(snapshot.workers)
+
+        results['render_workers'] = time_step(
+            lambda: app.render_workers(snapshot, view=(None, None)))
+
+        results['callback_full'] = time_step(lambda: call(None))
+        full_bytes = len(call(None).data)
+
+        def clock_out_one():
+            # Toggles one present worker, so every run sees a change.
+            row = next(a for a in server.attendance
+                       if a['EmployeeId'] == snapshot.workers[0].id_number
+                       - 4000)
+            row['IsClosedInterval'] = not row['IsClosedInterval']
+            previous = poller.snapshot.version
+            poller.refresh()
+            started = time.perf_counter()
+            call(previous)
+            return time.perf_counter() - started
+
+        results['callback_patch'] = [clock_out_one() for _ in range(repeat)]
+
+        current = poller.snapshot.version
+        results['callback_unchanged'] = time_step(lambda: call(current))
+
+        for key, value in list(results.items()):
+            if isinstance(value, list):
+                results[key] = summarize(value)
+
+        results['callback_full']['response_bytes'] = full_bytes
+        results['peak_memory_bytes'] = {
+            'get_workers_warm': peak_memory(client.get_workers),
+            'render_workers': peak_memory(
+                lambda: app.render_workers(snapshot, view=(None, None))),
+            'callback_full': peak_memory(lambda: call(None))
+        }
+
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, repeat: int = 5, latency: float = 0.02) -> dict:
+    # Imported here, the app reads config.yaml and builds its indexes.
+    import app
+
+    poller = app.presence_poller
+    # The benchmark refreshes explicitly, so the callback must not start the
+    # background poller, and the fake roster must never overwrite the
+    # stored snapshot or end up in the presence history and change feed.
+    saved = poller.client, poller.store_path, poller._listeners
+    poller.start = lambda: None
+    poller.store_path = None
+    poller._listeners = []
+
+    try:
+        results = [bench_size(app, size, repeat, latency) for size in sizes]
+    finally:
+        del poller.start
+        poller.client, poller.store_path, poller._listeners = saved
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'latency_seconds': latency,
+        'results': results
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """ Steps whose median got slower than `threshold` times the baseline. """
+    old = {r['roster_size']: r for r in baseline['results']}
+    regressions = []
+
+    for result in current['results']:
+        before = old.get(result['roster_size'])
+        if before is None:
+            continue
+        for step, stats in result.items():
+            if not isinstance(stats, dict) or 'median' not in stats:
+                continue
+            if step not in before:
+                continue
+            ratio = stats['median'] / max(before[step]['median'], 1e-9)
+            line = (f'{result["roster_size"]:>6} {step:<20} '
+                    f'{before[step]["median"] * 1000:9.2f} ms -> '
+                    f'{stats["median"] * 1000:9.2f} ms ({ratio:.2f}x)')
+            print(line)
+            if ratio > threshold:
+                regressions.append(line)
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Benchmark the ERP refresh and kiosk callback path.')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=list(DEFAULT_SIZES))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help='Seconds added to every fake ERP request')
+    parser.add_argument('--output', help='Result file (JSON)')
+    parser.add_argument('--compare', help='Earlier result file to compare')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Slowdown ratio reported as a regression')
+    args = parser.parse_args()
+
+    result = run(args.sizes, repeat=args.repeat, latency=args.latency)
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIRECTORY / f'bench-{datetime.now():%Y%m%d-%H%M%S}.json')
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, mode='w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+
+    for r in result['results']:
+        print(f'{r["roster_size"]:>6} workers ({r["present"]} present): ' +
+              ', '.join(f'{step} {stats["median"] * 1000:.1f} ms'
+                        for step, stats in r.items()
+                        if isinstance(stats, dict) and 'median' in stats))
+    print(f'Results written to {output}')
+
+    if args.compare:
+        with open(args.compare, mode='r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} step(s) slower than '
+                  f'{args.threshold}x the baseline')
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+"""
+Fake Monitor G5 server
+----------------------
+
+A tiny local stand-in for the Monitor G5 API, used by the tests and the
+benchmarks to exercise the client against real HTTP round-trips. It serves
+`/login`, `/api/v1/Common/Persons` and
+`/api/v1/TimeRecording/AttendanceChart`.
+
+`latency` is added to every request (login included) to simulate the
+network, `delays` adds a per-endpoint delay on top to simulate a slow ERP.
+`make_roster` generates Persons and AttendanceChart payloads of any size.
+"""
+
+PREFIX = '/no/001.1'
+
+FIRST_NAMES = ('Tom', 'Jane', 'Ola', 'Kari', 'Per', 'Anne', 'Lars', 'Ingrid')
+LAST_NAMES = ('Harnes', 'Doe', 'Nordmann', 'Hansen', 'Berg', 'Dahl')
+
+
+def make_roster(size: int, present_ratio: float = 0.7, locations: int = 3,
+                departments: int = 10, seed: int = 1
+                ) -> tuple[list[dict], list[dict]]:
+    """ Persons and AttendanceChart payloads for `size` employees. """
+    rng = random.Random(seed)
+    persons = []
+    attendance = []
+
+    for i in range(size):
+        persons.append({
+            'Id': i + 1,
+            'EmployeeNumber': 4001 + i,
+            'FirstName': rng.choice(FIRST_NAMES),
+            'LastName': f'{rng.choice(LAST_NAMES)} {i}',
+            'WarehouseId': rng.randint(1, locations),
+            'DepartmentId': rng.randint(1, departments)
+        })
+        present = rng.random() < present_ratio
+        attendance.append({
+            'EmployeeId': i + 1,
+            'IsClosedInterval': not present,
+            'AbsenceCode': None
+        })
+
+    return persons, attendance
+
+
+class FakeG5Server:
+    def __init__(self, persons=None, attendance=None, delays=None,
+                 latency: float = 0.0) -> None:
+        self.persons = persons or []
+        self.attendance = attendance or []
+        self.delays = delays or {}
+        self.latency = latency
+        self.logins = 0
+        self.requests: list[str] = []
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address
+        return f'http://{host}:{port}{PREFIX}'
+
+    def __enter__(self) -> 'FakeG5Server':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, like the real API, so the client's pooled
+            # connections are actually reused.
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately, without this every
+            # reply waits for a delayed ACK.
+            disable_nagle_algorithm = True
+
+            def log_message(self, *_):
+                pass
+
+            def _reply(self, payload, headers=None) -> None:
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                self.rfile.read(length)
+                fake.requests.append(self.path)
+                time.sleep(fake.latency)
+                fake.logins += 1
+                self._reply({}, {'x-monitor-sessionid':
+                                 f'SESSION-{fake.logins}'})
+
+            def do_GET(self):
+                path = self.path.removeprefix(PREFIX)
+                fake.requests.append(path)
+                time.sleep(fake.latency + fake.delays.get(path, 0))
+
+                if path == '/api/v1/Common/Persons':
+                    self._reply(fake.persons)
+                elif path == '/api/v1/TimeRecording/AttendanceChart':
+                    self._reply(fake.attendance)
+                else:
+                    self.send_error(404)
+
+        return Handler
@@ -0,0 +1,372 @@
+import argparse
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urljoin
+
+import requests
+
+if __package__ in (None, ''):
+    # Allow `python benchmarks/load_kiosks.py` from the repository root.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.bench_refresh import RESULTS_DIRECTORY, callback_body, \
+    summarize
+
+try:
+    import psutil
+except ImportError:  # psutil is optional, CPU/RSS are skipped without it
+    psutil = None
+
+"""
+Kiosk load generator
+--------------------
+
+Simulates a fleet of kiosks against a running `run_production.py` to find
+how many displays one Waitress instance can sustain.
+
+Every simulated kiosk behaves like the browser: it loads the page once,
+then calls the `_dash-update-component` callback every `--interval`
+seconds (with jitter) and sends back the version it last rendered. Images
+in newly rendered cards are fetched once per kiosk, as the browser cache
+would, on a shared pool (`--image-workers`) like the browser's parallel
+connections, so they don't hold up the next callback. Kiosks start spread
+over one interval so they don't all fire at once.
+
+Like assets/push.js, each kiosk also holds a push stream
+(`/api/presence/stream`) and, while it is up, calls back only when the
+stream announces a change instead of on the interval. A refused stream
+falls back to the interval and is retried a minute later. `--no-streams`
+simulates kiosks without push.
+
+The fleet is scaled through the given kiosk counts, one step each, and for
+every step throughput, p50/p95/p99 latency and error rate are reported.
+With psutil installed and the server process known (`--pid`, or
+`--start-server`), server CPU and RSS are sampled as well.
+
+    python benchmarks/load_kiosks.py --kiosks 10 50 100 200
+    python benchmarks/load_kiosks.py --start-server --interval 5 --duration 30
+"""
+
+PAGE_PATHS = ('/', '/_dash-layout', '/_dash-dependencies')
+STREAM_PATH = 'api/presence/stream'
+# As push.js: EventSource reconnects after the stream's `retry`, a refused
+# stream is retried later.
+STREAM_RETRY_SECONDS = 5
+STREAM_REFUSED_SECONDS = 60
+
+
+def image_urls(payload) -> set[str]:
+    """ `src` of every Img component in a callback response. """
+    found = set()
+    stack = [payload]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            if item.get('type') == 'Img':
+                src = item.get('props', {}).get('src')
+                if src:
+                    found.add(src)
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+    return found
+
+
+class Recorder:
+    """ Latencies and errors collected from all kiosk threads. """
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = {
+            'callback': [], 'image': [], 'stream': []}
+        self.errors: dict[str, int] = {'callback': 0, 'image': 0,
+                                       'stream': 0}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies[kind].append(seconds)
+            if not ok:
+                self.errors[kind] += 1
+
+
+class Kiosk(threading.Thread):
+    def __init__(self, base_url: str, search: str, interval: float,
+                 image_pool: ThreadPoolExecutor | None, streams: bool,
+                 recorder: Recorder, stop: threading.Event, number: int
+                 ) -> None:
+        super().__init__(name=f'Kiosk-{number}', daemon=True)
+        self.base_url = base_url.rstrip('/') + '/'
+        self.search = search
+        self.interval = interval
+        self.image_pool = image_pool
+        self.streams = streams
+        self.recorder = recorder
+        self.stop = stop
+
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = f'LoadKiosk/{number}'
+        self.rendered_version = None
+        self.rendered_page = None
+        self.cached_images: set[str] = set()
+
+        # Set by the push stream: up, and a change was announced.
+        self.streaming = False
+        self.pushed = threading.Event()
+        self._stream: requests.Response | None = None
+
+    def run(self) -> None:
+        # Spread the fleet over one interval, like kiosks booted over time.
+        if self.stop.wait(random.uniform(0, self.interval)):
+            return
+
+        for path in PAGE_PATHS:
+            self._request('page', 'GET', path)
+
+        if self.streams:
+            threading.Thread(target=self.listen, name=f'{self.name}-push',
+                             daemon=True).start()
+
+        try:
+            while not self.stop.is_set():
+                self.refresh()
+                self.wait()
+        finally:
+            if self._stream is not None:
+                self._stream.close()
+
+    def wait(self) -> None:
+        """ Until the interval is over, or a push while streaming. """
+        deadline = time.monotonic() + (
+            self.interval * random.uniform(0.9, 1.1))
+        while not self.stop.is_set():
+            if self.pushed.wait(1):
+                self.pushed.clear()
+                return
+            if not self.streaming and time.monotonic() >= deadline:
+                return
+
+    def listen(self) -> None:
+        """ Holds the push stream and reconnects like EventSource. """
+        while not self.stop.is_set():
+            response = self._request('stream', 'GET', STREAM_PATH,
+                                     stream=True)
+            if response is None or response.status_code != 200:
+                self.streaming = False
+                self.stop.wait(STREAM_REFUSED_SECONDS)
+                continue
+
+            self._stream = response
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    if self.stop.is_set():
+                        break
+                    if line.startswith('event:'):
+                        self.streaming = True
+                        if line == 'event: presence':
+                            self.pushed.set()
+            except Exception:
+                pass  # Dropped, or closed by the kiosk on stop
+            finally:
+                response.close()
+                self._stream = None
+                self.streaming = False
+            self.stop.wait(STREAM_RETRY_SECONDS)
+
+    def refresh(self) -> None:
+        response = self._request(
+            'callback', 'POST', '_dash-update-component',
+            json=callback_body(self.rendered_version, self.search,
+                               self.rendered_page))
+        if response is None or response.status_code != 200:
+            return
+
+        outputs = response.json().get('response', {})
+        rendered = outputs.get('rendered-version', {}).get('data')
+        if rendered is not None:
+            self.rendered_version = rendered['version']
+        page = outputs.get('rendered-page', {}).get('data')
+        if page is not None:
+            self.rendered_page = page
+
+        if self.image_pool is not None:
+            for src in image_urls(outputs) - self.cached_images:
+                self.cached_images.add(src)
+                self.image_pool.submit(self._request, 'image', 'GET', src)
+
+    def _request(self, kind: str, method: str, path: str, **kwargs
+                 ) -> requests.Response | None:
+        started = time.perf_counter()
+        try:
+            # A push stream sends a ping every keepalive (15 s by default).
+            response = self.session.request(
+                method, urljoin(self.base_url, path.lstrip('/')),
+                timeout=(30, 60) if kind == 'stream' else 30, **kwargs)
+            # 204: Dash had nothing to update, or the push stream was
+            # refused (limit reached), which counts as a stream error.
+            ok = response.status_code in (
+                (200,) if kind == 'stream' else (200, 204, 304))
+        except requests.RequestException:
+            response, ok = None, False
+
+        if kind in self.recorder.latencies:
+            self.recorder.record(kind, time.perf_counter() - started, ok)
+        return response
+
+
+def sample_process(pid: int | None, stop: threading.Event,
+                   samples: list[tuple[float, int]]) -> None:
+    """ Appends (cpu %, rss bytes) of the server every second. """
+    if psutil is None or pid is None:
+        return
+    try:
+        process = psutil.Process(pid)
+        process.cpu_percent()
+        while not stop.wait(1):
+            with process.oneshot():
+                # Waitress runs in one process, children cover a launcher.
+                rss = process.memory_info().rss + sum(
+                    c.memory_info().rss for c in process.children())
+                samples.append((process.cpu_percent(), rss))
+    except psutil.Error:
+        pass
+
+
+def run_step(base_url: str, kiosks: int, duration: float, interval: float,
+             search: str, image_workers: int, streams: bool,
+             pid: int | None) -> dict:
+    recorder = Recorder()
+    stop = threading.Event()
+    image_pool = (ThreadPoolExecutor(max_workers=image_workers)
+                  if image_workers > 0 else None)
+    fleet = [Kiosk(base_url, search, interval, image_pool, streams,
+                   recorder, stop, n)
+             for n in range(kiosks)]
+    samples: list[tuple[float, int]] = []
+    sampler = threading.Thread(target=sample_process,
+                               args=(pid, stop, samples), daemon=True)
+
+    started = time.perf_counter()
+    sampler.start()
+    for kiosk in fleet:
+        kiosk.start()
+    stop.wait(duration)
+    stop.set()
+    for kiosk in fleet:
+        kiosk.join(timeout=35)
+    if image_pool is not None:
+        image_pool.shutdown(cancel_futures=True)
+    elapsed = time.perf_counter() - started
+
+    result = {'kiosks': kiosks, 'duration_seconds': elapsed}
+    for kind, latencies in recorder.latencies.items():
+        if not latencies:
+            continue
+        result[kind] = dict(
+            summarize(latencies),
+            throughput_per_second=len(latencies) / elapsed,
+            errors=recorder.errors[kind],
+            error_rate=recorder.errors[kind] / len(latencies)
+        )
+
+    if samples:
+        cpu = [c for c, _ in samples]
+        result['server'] = {
+            'cpu_percent_mean': sum(cpu) / len(cpu),
+            'cpu_percent_max': max(cpu),
+            'rss_bytes_max': max(r for _, r in samples)
+        }
+
+    return result
+
+
+def start_server(base_url: str, timeout: float = 60) -> subprocess.Popen:
+    """ Starts run_production.py and waits until it answers. """
+    root = Path(__file__).resolve().parent.parent
+    process = subprocess.Popen([sys.executable, 'run_production.py'],
+                               cwd=root)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(base_url, timeout=2)
+            return process
+        except requests.RequestException:
+            time.sleep(0.5)
+    process.terminate()
+    raise SystemExit(f'Server did not answer on {base_url}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Simulate a kiosk fleet against run_production.py.')
+    parser.add_argument('--url', default='http://127.0.0.1:8050')
+    parser.add_argument('--kiosks', type=int, nargs='+',
+                        default=[10, 50, 100])
+    parser.add_argument('--duration', type=float, default=60,
+                        help='Seconds per step')
+    parser.add_argument('--interval', type=float, default=30,
+                        help='Seconds between refreshes of one kiosk')
+    parser.add_argument('--search', default='',
+                        help='Kiosk URL query, e.g. ?location=all')
+    parser.add_argument('--no-images', action='store_true')
+    parser.add_argument('--image-workers', type=int, default=16,
+                        help='Parallel image fetches of the whole fleet')
+    parser.add_argument('--no-streams', action='store_true',
+                        help="Kiosks don't hold a push stream")
+    parser.add_argument('--pid', type=int, help='Server process for CPU/RSS')
+    parser.add_argument('--start-server', action='store_true',
+                        help='Start run_production.py for the test')
+    parser.add_argument('--output', help='Result file (JSON)')
+    args = parser.parse_args()
+
+    server = start_server(args.url) if args.start_server else None
+    pid = server.pid if server else args.pid
+    if pid is not None and psutil is None:
+        print('psutil not installed, server CPU/RSS are not sampled')
+
+    try:
+        steps = []
+        for kiosks in args.kiosks:
+            step = run_step(args.url, kiosks, args.duration, args.interval,
+                            args.search,
+                            0 if args.no_images else args.image_workers,
+                            not args.no_streams, pid)
+            steps.append(step)
+
+            callback = step.get('callback', {})
+            server_stats = step.get('server')
+            print(f'{kiosks:>5} kiosks: '
+                  f'{callback.get("throughput_per_second", 0):7.1f} req/s, '
+                  f'p50 {callback.get("median", 0) * 1000:7.1f} ms, '
+                  f'p95 {callback.get("p95", 0) * 1000:7.1f} ms, '
+                  f'p99 {callback.get("p99", 0) * 1000:7.1f} ms, '
+                  f'errors {callback.get("error_rate", 0):.1%}' +
+                  (f', cpu {server_stats["cpu_percent_mean"]:.0f}%, '
+                   f'rss {server_stats["rss_bytes_max"] / 2 ** 20:.0f} MB'
+                   if server_stats else ''))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIRECTORY / f'load-{datetime.now():%Y%m%d-%H%M%S}.json')
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, mode='w', encoding='utf-8') as f:
+        json.dump({
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'url': args.url,
+            'interval_seconds': args.interval,
+            'search': args.search,
+            'steps': steps
+        }, f, indent=2)
+    print(f'Results written to {output}')
+
+
+if __name__ == '__main__':
+    main()
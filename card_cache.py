@@ -0,0 +1,72 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+import metrics
+
+"""
+Card Cache
+----------
+
+Bounded LRU of rendered worker cards. A worker's card only depends on the
+worker's id, name and department and on a few settings, so it is built
+once and reused on every refresh while the worker stays on site.
+
+Everything else a card depends on (card mode, image and logo index
+versions) is returned by the `generation` callable. When the generation
+changes, e.g. a photo was added or the card mode changed, the whole cache is
+dropped and cards are built again on demand.
+
+The cached components are shared between responses and must not be
+modified after they are built.
+"""
+
+
+class CardCache:
+    def __init__(self, build: Callable, generation: Callable[[], Hashable],
+                 max_size: int = 2048) -> None:
+        self.build = build
+        self.generation = generation
+        self.max_size = max_size
+
+        self._cards: OrderedDict[Hashable, object] = OrderedDict()
+        self._generation: Hashable = None
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, worker):
+        """ Cached card for `key`, built from `worker` on a miss. """
+        if self.max_size <= 0:
+            return self._build(worker)
+
+        generation = self.generation()
+        with self._lock:
+            if generation != self._generation:
+                self._cards.clear()
+                self._generation = generation
+
+            card = self._cards.get(key)
+            if card is not None:
+                self._cards.move_to_end(key)
+                metrics.CARD_CACHE_LOOKUPS.inc(result='hit')
+                return card
+
+        metrics.CARD_CACHE_LOOKUPS.inc(result='miss')
+        card = self._build(worker)
+
+        with self._lock:
+            if generation == self._generation:
+                self._cards[key] = card
+                while len(self._cards) > self.max_size:
+                    self._cards.popitem(last=False)
+        return card
+
+    def _build(self, worker):
+        with metrics.CARD_BUILD_SECONDS.time():
+            return self.build(worker)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cards.clear()
+
+    def __len__(self) -> int:
+        return len(self._cards)
@@ -0,0 +1,90 @@
+import gzip
+
+from flask import Response
+from werkzeug.datastructures import Accept
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is used without it
+    brotli = None
+
+"""
+Compression
+-----------
+
+gzip (and brotli, when installed) compression of HTTP responses.
+
+Dash callbacks, the layout and the roll-call exports are JSON that shrinks
+to a fraction of its size, which matters when a fleet of kiosks on a
+factory WiFi refreshes at once. Dynamic responses are compressed on the
+way out with fast settings, static assets once with the strongest
+settings (see static_assets.py).
+
+Streamed responses (push streams) and files (photos, thumbnails) are left
+alone.
+"""
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+COMPRESSIBLE_TYPES = frozenset((
+    'application/javascript',
+    'application/json',
+    'image/svg+xml',
+    'image/vnd.microsoft.icon',
+    'image/x-icon',
+    'text/css',
+    'text/csv',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+))
+
+# Fast settings for responses compressed on every request.
+DYNAMIC_GZIP_LEVEL = 6
+DYNAMIC_BROTLI_QUALITY = 4
+
+
+def negotiate(accept_encodings: Accept, offered) -> str:
+    """ Best offered encoding the client accepts, 'identity' if none. """
+    for encoding in ENCODINGS:
+        if encoding in offered and accept_encodings[encoding] > 0:
+            return encoding
+    return 'identity'
+
+
+def compress(data: bytes, encoding: str, dynamic: bool = False) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(
+            data, quality=DYNAMIC_BROTLI_QUALITY if dynamic else 11)
+    if encoding == 'gzip':
+        # mtime=0 keeps the output identical for identical input.
+        return gzip.compress(
+            data, compresslevel=DYNAMIC_GZIP_LEVEL if dynamic else 9, mtime=0)
+    return data
+
+
+def compress_response(response: Response, accept_encodings: Accept,
+                      min_bytes: int = 1024) -> Response:
+    """ Compresses a buffered response in place when it is worth it. """
+    if (response.status_code != 200 or response.direct_passthrough or
+            response.is_streamed or
+            'Content-Encoding' in response.headers or
+            response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    data = response.get_data()
+    if len(data) < min_bytes:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(accept_encodings, ENCODINGS)
+    if encoding == 'identity':
+        return response
+
+    response.set_data(compress(data, encoding, dynamic=True))
+    response.headers['Content-Encoding'] = encoding
+    # Same content, other bytes: the ETag becomes weak, as with nginx.
+    etag, _ = response.get_etag()
+    if etag:
+        response.set_etag(etag, weak=True)
+    return response
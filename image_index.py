@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+from logger import logger
+
+"""
+Image Index
+-----------
+
+In-memory index of an image directory (employee photos, department logos),
+so rendering a card never touches the filesystem. The image directory is
+often a network share, where every `exists()` or `iterdir()` is a round-trip.
+
+The directory is listed once when the index is first used and after that
+only when its mtime changes, which happens when files are added, removed or
+renamed. A background thread checks the mtime every `rescan_seconds`, one
+round-trip however many images there are.
+
+The listing keeps a stamp (mtime and size) per file, and `stamp()` gives
+card URLs a version without touching the share. A photo replaced in place
+doesn't change the directory mtime, so every `sweep_seconds` the listing
+is rebuilt anyway, which costs a stat per image. The sweep is much rarer
+than the mtime check: a replaced photo can take up to `sweep_seconds` to
+show up. `version` changes whenever the listing or a stamp does.
+
+Lookups follow the same precedence as the old per-card probing:
+1. `<key><ext>` for each extension, in the order given
+2. First file in the directory whose stem equals or contains the key
+   (only when `partial` is enabled)
+3. The default image
+"""
+
+# Lookups memoized per listing. Keys can come from requests, so once this
+# many are memoized, further keys are resolved without being remembered.
+MAX_MEMOIZED = 4096
+
+
+class ImageIndex:
+    def __init__(self, directory: str | Path, default: str,
+                 extensions: tuple[str, ...], partial: bool = True,
+                 rescan_seconds: float = 60, sweep_seconds: float = 3600
+                 ) -> None:
+        self.directory = Path(directory)
+        self.default = default
+        self.extensions = extensions
+        self.partial = partial
+        self.rescan_seconds = rescan_seconds
+        self.sweep_seconds = sweep_seconds
+
+        # Bumped every time the directory listing is rebuilt.
+        self.version = 0
+
+        self._mtime: float | None = None
+        self._swept_at = float('-inf')
+        # File name -> stamp of the last listing.
+        self._files: dict[str, str] = {}
+        # (directory listing, exact stem -> name, memoized lookups), swapped
+        # as a whole so readers never see a half-built index.
+        self._state: tuple[tuple[str, ...], dict, dict] = ((), {}, {})
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def lookup(self, key) -> str:
+        """ Returns the image path for a key, without filesystem I/O. """
+        if self._mtime is None:
+            self.refresh()
+
+        key = str(key)
+        names, exact, resolved = self._state
+        path = resolved.get(key)
+        if path is None:
+            path = self._resolve(key, names, exact)
+            if len(resolved) < MAX_MEMOIZED:
+                resolved[key] = path
+        return path
+
+    def stamp(self, path: str) -> str | None:
+        """ Stamp of an indexed file from the last listing, no I/O. """
+        if Path(path).parent != self.directory:
+            return None
+        return self._files.get(Path(path).name)
+
+    def refresh(self) -> bool:
+        """ Rebuilds the index if the directory changed, True if it did. """
+        with self._lock:
+            now = time.monotonic()
+            try:
+                mtime = os.stat(self.directory).st_mtime
+                sweep = now - self._swept_at >= self.sweep_seconds
+                if mtime == self._mtime and not sweep:
+                    return False
+                with os.scandir(self.directory) as entries:
+                    files = {e.name: file_stamp(e.stat())
+                             for e in entries if e.is_file()}
+            except (FileNotFoundError, PermissionError, OSError) as e:
+                # Network share offline, permission error, etc.
+                # Keep serving the last known listing.
+                if self._mtime is None:
+                    logger.warning(
+                        f'Image directory unavailable {self.directory}: {e}')
+                    self._mtime = 0.0
+                return False
+
+            self._mtime = mtime
+            self._swept_at = now
+            if files == self._files:
+                return False
+
+            self._index(tuple(files))
+            self._files = files
+            self.version += 1
+            logger.info(f'Indexed {len(files)} images in {self.directory}')
+            return True
+
+    def start(self) -> None:
+        """ Starts the background rescan thread, safe to call repeatedly. """
+        if self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='ImageIndex', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _index(self, names: tuple[str, ...]) -> None:
+        ranks = {ext: rank for rank, ext in enumerate(self.extensions)}
+        exact: dict[str, tuple[int, str]] = {}
+
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            rank = ranks.get(ext)
+            if rank is not None and (stem not in exact or
+                                     rank < exact[stem][0]):
+                exact[stem] = (rank, name)
+
+        self._state = (
+            names,
+            {stem: name for stem, (_, name) in exact.items()},
+            {}
+        )
+
+    def _resolve(self, key: str, names: tuple[str, ...],
+                 exact: dict[str, str]) -> str:
+        name = exact.get(key)
+        if name is not None:
+            return str(self.directory / name)
+
+        if self.partial:
+            for name in names:
+                stem, ext = os.path.splitext(name)
+                if ext.lower() in self.extensions and key in stem:
+                    return str(self.directory / name)
+
+        return self.default
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.rescan_seconds):
+            self.refresh()
+
+
+def file_stamp(stat: os.stat_result) -> str:
+    """ Changes whenever a file is rewritten, without reading it. """
+    return f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
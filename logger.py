@@ -1,7 +1,23 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
 
+"""
+Logging
+-------
+
+`logger` is the application log, `access_logger` records kiosk requests.
+
+By default handlers run on the thread that logs. `configure()` can move
+file and console output to dedicated listener threads (queue mode), so
+request threads only put records on a queue. It can also aggregate the
+repetitive access lines into one line per kiosk per time window, with the
+number of requests since the previous line in parentheses.
+"""
+
 os.makedirs('logs', exist_ok=True)
 
 logger = logging.getLogger('OnSitePresence')
@@ -25,7 +41,8 @@ file_handler.setFormatter(
     logging.Formatter('[%(asctime)s] %(levelname)s - %(message)s'))
 
 access_handler.setFormatter(
-    logging.Formatter('[%(asctime)s] %(client_ip)s %(path)s %(user_agent)s'))
+    logging.Formatter(
+        '[%(asctime)s] %(client_ip)s %(path)s %(user_agent)s (%(count)s)'))
 
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(
@@ -37,9 +54,44 @@ class AccessDefaultsFilter(logging.Filter):
         record.client_ip = getattr(record, 'client_ip', 'unknown')
         record.path = getattr(record, 'path', 'unknown')
         record.user_agent = getattr(record, 'user_agent', 'unknown')
+        record.count = getattr(record, 'count', 1)
         return True
 
 
+class AccessAggregateFilter(logging.Filter):
+    """
+    Lets one access record per kiosk (client ip, path, user agent) through
+    per window and drops the rest. The record that gets through carries the
+    number of requests since the previous one in `count`.
+    """
+    def __init__(self, window_seconds: float) -> None:
+        super().__init__()
+        self.window_seconds = window_seconds
+        self._windows: dict[tuple, list] = {}  # key: [started, count]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.client_ip, record.path, record.user_agent)
+
+        with self._lock:
+            window = self._windows.setdefault(key, [float('-inf'), 0])
+            window[1] += 1
+            if record.created - window[0] < self.window_seconds:
+                return False
+
+            record.count = window[1]
+            self._windows[key] = [record.created, 0]
+            self._prune(record.created)
+            return True
+
+    def _prune(self, now: float) -> None:
+        """ Forgets kiosks that have been quiet for ten windows. """
+        idle = now - self.window_seconds * 10
+        for key in [k for k, (started, _) in self._windows.items()
+                    if started < idle]:
+            del self._windows[key]
+
+
 if not logger.handlers:
     logger.addHandler(file_handler)
     logger.addHandler(console_handler)
@@ -48,3 +100,47 @@ if not logger.handlers:
 if not access_logger.handlers:
     access_logger.addHandler(access_handler)
     access_logger.addFilter(AccessDefaultsFilter())
+
+
+_listeners: list[QueueListener] = []
+
+
+def _use_queue(target: logging.Logger) -> None:
+    """ Moves the handlers of a logger behind a queue and listener thread. """
+    handlers = [h for h in target.handlers if not isinstance(h, QueueHandler)]
+    if not handlers:
+        return
+
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+
+    for handler in handlers:
+        target.removeHandler(handler)
+    target.addHandler(QueueHandler(records))
+
+    listener.start()
+    _listeners.append(listener)
+
+
+def _stop_listeners() -> None:
+    """ Flushes queued records on exit. """
+    while _listeners:
+        _listeners.pop().stop()
+
+
+def configure(use_queue: bool = False,
+              access_window_seconds: float = 0) -> None:
+    """
+    Enables queue based logging and/or access line aggregation. Safe to
+    call more than once.
+    """
+    if use_queue and not _listeners:
+        _use_queue(logger)
+        _use_queue(access_logger)
+        atexit.register(_stop_listeners)
+
+    for f in list(access_logger.filters):
+        if isinstance(f, AccessAggregateFilter):
+            access_logger.removeFilter(f)
+    if access_window_seconds > 0:
+        access_logger.addFilter(AccessAggregateFilter(access_window_seconds))
@@ -0,0 +1,230 @@
+import bisect
+import threading
+import time
+from collections.abc import Callable
+
+"""
+Metrics
+-------
+
+Small, dependency free metrics registry rendered in the Prometheus text
+format on `/metrics`.
+
+Metrics are module level objects, so instrumented code simply does
+`metrics.ERP_LOGIN_SECONDS.observe(...)` or uses `.time()`. While metrics
+are disabled (the default until `configure(True)` is called) every update
+returns straight away, so instrumentation costs next to nothing.
+
+Gauges are read through a callback when `/metrics` is scraped, so values
+that already exist elsewhere (snapshot age, breaker state) aren't copied
+on the hot path.
+"""
+
+enabled = False
+
+# Seconds, from fast in-memory work up to slow ERP calls.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1, 2.5, 5, 10, 30)
+BYTE_BUCKETS = (100, 1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000)
+
+_registry: list['_Metric'] = []
+
+
+def configure(enable: bool) -> None:
+    global enabled
+    enabled = enable
+
+
+def render() -> str:
+    """ All registered metrics in the Prometheus text format. """
+    lines = []
+    for metric in _registry:
+        lines.append(f'# HELP {metric.name} {metric.help}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+
+def _labels(labels: tuple, extra: str = '') -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str) -> None:
+        super().__init__(name, help_text)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if not enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f'{self.name}{_labels(key)} {value}'
+                for key, value in values.items()]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name: str, help_text: str) -> None:
+        super().__init__(name, help_text)
+        self._callback: Callable[[], float | None] | None = None
+
+    def set_function(self, callback: Callable[[], float | None]) -> None:
+        self._callback = callback
+
+    def samples(self) -> list[str]:
+        value = self._callback() if self._callback else None
+        if value is None:
+            return []
+        return [f'{self.name} {float(value)}']
+
+
+class CounterFunction(Gauge):
+    """ Counter whose value is kept elsewhere and read on scrape. """
+    kind = 'counter'
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str,
+                 buckets: tuple = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help_text)
+        self.buckets = buckets
+        # labels -> [bucket counts..., +Inf count, sum]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        if not enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * (len(self.buckets) + 1) + [0]
+            data[index] += 1
+            data[-1] += value
+
+    def time(self, **labels) -> '_Timer':
+        """ Context manager observing the time spent inside it. """
+        return _Timer(self, labels)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = {key: list(data) for key, data in self._values.items()}
+
+        lines = []
+        for key, data in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), data):
+                cumulative += count
+                le = 'le="' + str(bound) + '"'
+                lines.append(
+                    f'{self.name}_bucket{_labels(key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(key)} {data[-1]}')
+            lines.append(f'{self.name}_count{_labels(key)} {cumulative}')
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram: Histogram, labels: dict) -> None:
+        self.histogram = histogram
+        self.labels = labels
+        self.started = 0.0
+
+    def __enter__(self) -> '_Timer':
+        if enabled:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *_) -> None:
+        if enabled and self.started:
+            self.histogram.observe(time.perf_counter() - self.started,
+                                   **self.labels)
+
+
+class ActiveClients:
+    """ Counts distinct clients seen within the last `window_seconds`. """
+    def __init__(self, window_seconds: float) -> None:
+        self.window_seconds = window_seconds
+        self._seen: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def seen(self, *client) -> None:
+        if not enabled:
+            return
+        with self._lock:
+            self._seen[client] = time.monotonic()
+
+    def count(self) -> int:
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            for client in [c for c, t in self._seen.items() if t < cutoff]:
+                del self._seen[client]
+            return len(self._seen)
+
+
+ERP_LOGIN_SECONDS = Histogram(
+    'onsite_erp_login_seconds', 'ERP login latency')
+ERP_LOGINS = Counter(
+    'onsite_erp_logins_total', 'ERP logins')
+ERP_REQUEST_SECONDS = Histogram(
+    'onsite_erp_request_seconds',
+    'ERP request latency by endpoint (persons, attendance)')
+ERP_REFRESH_SECONDS = Histogram(
+    'onsite_erp_refresh_seconds', 'Full ERP refresh latency')
+RENDER_WORKERS_SECONDS = Histogram(
+    'onsite_render_workers_seconds', 'Time spent in render_workers')
+CARD_BUILD_SECONDS = Histogram(
+    'onsite_card_build_seconds', 'Time spent building one worker card')
+CARD_CACHE_LOOKUPS = Counter(
+    'onsite_card_cache_lookups_total',
+    'Worker card cache lookups by result (hit, miss)')
+IMAGE_LOOKUPS = Counter(
+    'onsite_image_lookups_total',
+    'Image resolver lookups by index and result (hit, miss)')
+CALLBACK_RESPONSE_BYTES = Histogram(
+    'onsite_callback_response_bytes',
+    'Dash callback response size as sent (compressed)',
+    buckets=BYTE_BUCKETS)
+SNAPSHOT_AGE_SECONDS = Gauge(
+    'onsite_snapshot_age_seconds', 'Age of the presence snapshot')
+SNAPSHOT_STALE = Gauge(
+    'onsite_snapshot_stale', '1 while the last ERP refresh failed')
+ACTIVE_KIOSKS = Gauge(
+    'onsite_active_kiosks', 'Kiosks (client ip and user agent) seen lately')
+PUSH_STREAMS = Gauge(
+    'onsite_push_streams', 'Open presence push streams')
+ERP_RETRIES = CounterFunction(
+    'onsite_erp_retries_total', 'Retried ERP refreshes')
+ERP_FAILURES = CounterFunction(
+    'onsite_erp_failures_total', 'ERP refreshes that failed after retries')
+ERP_BREAKER_OPEN = Gauge(
+    'onsite_erp_breaker_open', '1 while the ERP circuit breaker is open')
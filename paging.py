@@ -0,0 +1,62 @@
+from typing import NamedTuple
+
+from api_client.base_client import UsersList
+
+"""
+Paging
+------
+
+Large-roster mode for kiosks: instead of every present worker, only one
+page of `page_size` cards is sent to the browser, and the kiosk rotates
+through the pages every `page_seconds`. Payload and DOM stay the same size
+whether 50 or 1,500 people are on site, and nobody has to scroll.
+
+With `page_group_departments` the workers are ordered by department and
+each page gets a heading wherever a department starts, including at the
+top of a page that continues one.
+"""
+
+
+class DepartmentHeading(NamedTuple):
+    department: int | str
+
+
+def page_count(total: int, page_size: int) -> int:
+    """ Number of pages, at least one. page_size 0 means a single page. """
+    if page_size <= 0 or total <= page_size:
+        return 1
+    return -(-total // page_size)
+
+
+def page_items(workers: tuple[UsersList, ...], page: int = 0,
+               page_size: int = 0, group_departments: bool = False
+               ) -> tuple:
+    """ Workers on a page, with department headings when grouped. """
+    if group_departments:
+        # Stable, keeps the name order within a department.
+        workers = tuple(sorted(workers,
+                               key=lambda w: _department_key(w.department)))
+
+    if page_size > 0:
+        page %= page_count(len(workers), page_size)
+        workers = workers[page * page_size:(page + 1) * page_size]
+
+    if not group_departments:
+        return workers
+
+    items = []
+    department = None
+    for worker in workers:
+        if not items or str(worker.department) != department:
+            department = str(worker.department)
+            items.append(DepartmentHeading(worker.department))
+        items.append(worker)
+    return tuple(items)
+
+
+def _department_key(department) -> tuple:
+    # Numeric ids in numeric order, names after them.
+    try:
+        return 0, int(department), ''
+    except (TypeError, ValueError):
+        return 1, 0, str(department)
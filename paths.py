@@ -0,0 +1,23 @@
+from pathlib import Path
+
+"""
+Paths
+-----
+
+Data files (snapshot, history, persons cache, thumbnails) are kept
+relative to the app directory, not to wherever the app or one of its
+command line tools was started from, so a service started from another
+working directory still finds its state.
+"""
+
+APP_DIRECTORY = Path(__file__).resolve().parent
+
+
+def data_path(path: str | Path | None) -> Path | None:
+    """
+    Resolves a configured path against the app directory. Absolute paths
+    are kept, an empty path (disabled) gives None.
+    """
+    if not path:
+        return None
+    return APP_DIRECTORY / path
@@ -0,0 +1,331 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import astuple, dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from api_client.base_client import BaseERPClient, UsersList
+from logger import logger
+from resilience import OPEN, CircuitBreaker, backoff_delay
+
+"""
+Presence Snapshot
+-----------------
+
+Keeps a single, shared view of who is currently on site so that the
+number of connected kiosks has no influence on the load put on the ERP.
+
+A background `PresencePoller` thread asks the ERP client for workers on
+its own schedule and publishes the result as an immutable
+`PresenceSnapshot`. Dash callbacks (and any other reader) only ever read
+the latest published snapshot, which is a plain attribute lookup and
+never waits on the ERP.
+
+The snapshot version is only bumped when the set of present workers
+actually changes, so readers can compare versions to detect changes. The
+last few versions are kept, so a reader that knows which version it showed
+last can work out what changed since.
+
+Each snapshot is indexed by location and department when it is published,
+so per-site and per-department kiosk views are a dictionary lookup. Index
+keys are strings, matching what arrives in a URL query.
+
+Clients that know their shift schedule (see `BaseERPClient.next_change`)
+let the poller sleep until just after the next scheduled clock-in/out,
+bounded by `min_seconds` and `max_seconds`. Around shift changes it polls
+often, overnight it backs off. Other clients are polled every
+`interval_seconds`.
+
+A failed refresh is retried with exponential backoff and jitter, and a
+circuit breaker stops calling an ERP that keeps failing. Meanwhile the last
+good snapshot keeps being served, marked as `stale`, with `fetched_at`
+telling how old it is.
+
+Listeners added with `add_listener` are called with every new snapshot
+version, e.g. to record presence history.
+
+With a `store_path`, every successful refresh is also written atomically to
+a small JSON file. At startup that file is loaded and published as a stale
+snapshot, so kiosks show the last known presence straight away, even if the
+ERP is down, until the first live refresh succeeds.
+"""
+
+# Number of past snapshot versions kept for diffing.
+HISTORY_SIZE = 16
+
+
+@dataclass(frozen=True)
+class PresenceSnapshot:
+    version: int
+    workers: tuple[UsersList, ...] = field(default_factory=tuple)
+    fetched_at: float | None = None
+    stale: bool = False
+    _views: dict[tuple[str | None, str | None], tuple[UsersList, ...]] = \
+        field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        views: dict[tuple[str | None, str | None], list[UsersList]] = {}
+        for w in self.workers:
+            location, department = str(w.location), str(w.department)
+            for key in ((location, None), (None, department),
+                        (location, department)):
+                views.setdefault(key, []).append(w)
+
+        object.__setattr__(self, '_views', {
+            key: tuple(workers) for key, workers in views.items()})
+
+    def view(self, location=None, department=None
+             ) -> tuple[UsersList, ...]:
+        """ Workers at a location and/or department, None matches all. """
+        if location is None and department is None:
+            return self.workers
+
+        key = (None if location is None else str(location),
+               None if department is None else str(department))
+        return self._views.get(key, ())
+
+    @property
+    def age_seconds(self) -> float | None:
+        """ Seconds since the snapshot was last confirmed by the ERP. """
+        if self.fetched_at is None:
+            return None
+        return time.time() - self.fetched_at
+
+
+class PresencePoller:
+    def __init__(self, client: BaseERPClient, interval_seconds: float,
+                 min_seconds: float | None = None,
+                 max_seconds: float | None = None,
+                 retries: int = 2, backoff_seconds: float = 1,
+                 backoff_max_seconds: float = 30,
+                 breaker: CircuitBreaker | None = None,
+                 store_path: str | Path | None = None,
+                 initial_version: int = 0) -> None:
+        self.client = client
+        self.interval_seconds = interval_seconds
+        self.min_seconds = min_seconds or interval_seconds
+        self.max_seconds = max_seconds or interval_seconds
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.breaker = breaker or CircuitBreaker()
+        self.store_path = Path(store_path) if store_path else None
+
+        self.retry_count = 0
+        self.failure_count = 0
+
+        self._snapshot = PresenceSnapshot(version=initial_version)
+        self._history: OrderedDict[int, PresenceSnapshot] = OrderedDict()
+        self._listeners: list[Callable[[PresenceSnapshot], None]] = []
+        self._publish_lock = threading.Lock()
+        self._changed = threading.Condition(self._publish_lock)
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self._load()
+
+    @property
+    def snapshot(self) -> PresenceSnapshot:
+        """ Latest published snapshot, never blocks on the ERP. """
+        return self._snapshot
+
+    def get_version(self, version) -> PresenceSnapshot | None:
+        """ Returns a recent snapshot by version, None if it aged out. """
+        return self._history.get(version)
+
+    def wait_for_change(self, version: int, timeout: float
+                        ) -> PresenceSnapshot:
+        """ Blocks until the version differs from `version` or timeout. """
+        with self._changed:
+            self._changed.wait_for(
+                lambda: self._snapshot.version != version, timeout)
+            return self._snapshot
+
+    def add_listener(self, listener: Callable[[PresenceSnapshot], None]
+                     ) -> None:
+        """ Calls `listener` with every new version, after it is published. """
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        """ Starts the background thread, safe to call more than once. """
+        if self._thread is not None:
+            return
+
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name='PresencePoller', daemon=True)
+            self._thread.start()
+            logger.info(
+                f'Presence poller started, refreshing every '
+                f'{self.interval_seconds}s')
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def refresh(self) -> PresenceSnapshot:
+        """ Fetches workers from the ERP once and publishes the result. """
+        workers = tuple(w for w in self.client.get_workers() if w.status)
+        snapshot = self._publish(workers, fetched_at=time.time())
+        self._save(snapshot)
+        return snapshot
+
+    def poll(self) -> PresenceSnapshot:
+        """
+        One scheduled refresh, retried with backoff and guarded by the
+        circuit breaker. On failure the last good snapshot stays published,
+        marked as stale.
+        """
+        if not self.breaker.allow():
+            return self._snapshot
+
+        for attempt in range(self.retries + 1):
+            try:
+                snapshot = self.refresh()
+            except Exception as e:
+                logger.error(f'Presence poller error: {e}')
+                if attempt < self.retries and not self._stop.is_set():
+                    self.retry_count += 1
+                    self._stop.wait(backoff_delay(
+                        attempt, self.backoff_seconds,
+                        self.backoff_max_seconds))
+                    continue
+                break
+            else:
+                self.breaker.record_success()
+                return snapshot
+
+        self.failure_count += 1
+        self.breaker.record_failure()
+        if self.breaker.state == OPEN:
+            logger.warning(
+                f'ERP circuit open, next attempt in '
+                f'{self.breaker.remaining_cooldown:.0f}s')
+
+        current = self._snapshot
+        return self._publish(current.workers, fetched_at=current.fetched_at,
+                             stale=True)
+
+    def stats(self) -> dict:
+        """ Poller, retry and circuit breaker counters. """
+        snapshot = self._snapshot
+        return {
+            'version': snapshot.version,
+            'stale': snapshot.stale,
+            'age_seconds': snapshot.age_seconds,
+            'retries': self.retry_count,
+            'failures': self.failure_count,
+            'breaker_state': self.breaker.state,
+            'breaker_opened': self.breaker.opened_count
+        }
+
+    def next_delay(self, now: datetime | None = None) -> float:
+        """ Seconds to wait before the next refresh. """
+        now = now or datetime.now()
+        try:
+            change = self.client.next_change(now)
+        except Exception as e:
+            logger.warning(f'Could not get next shift change: {e}')
+            change = None
+
+        if change is None:
+            return self.interval_seconds
+
+        # One extra second so the change has happened when we look.
+        until = (change - now).total_seconds() + 1
+        return min(self.max_seconds, max(self.min_seconds, until))
+
+    def _publish(self, workers: tuple[UsersList, ...],
+                 fetched_at: float | None, stale: bool = False
+                 ) -> PresenceSnapshot:
+        with self._changed:
+            current = self._snapshot
+            version = current.version
+            first_fetch = current.fetched_at is None and fetched_at is not None
+            if (first_fetch or workers != current.workers or
+                    stale != current.stale):
+                version += 1
+                logger.info(f'Active workers updated: {len(workers)}'
+                            f'{" (stale)" if stale else ""}')
+
+            self._snapshot = PresenceSnapshot(
+                version=version,
+                workers=workers,
+                fetched_at=fetched_at,
+                stale=stale
+            )
+
+            self._history[version] = self._snapshot
+            while len(self._history) > HISTORY_SIZE:
+                self._history.popitem(last=False)
+
+            snapshot = self._snapshot
+            if version != current.version:
+                self._changed.notify_all()
+
+        if version != current.version:
+            for listener in self._listeners:
+                try:
+                    listener(snapshot)
+                except Exception as e:
+                    logger.error(f'Presence listener {listener} failed: {e}')
+
+        return snapshot
+
+    def _load(self) -> None:
+        """ Publishes the stored snapshot as stale, if there is one. """
+        if self.store_path is None or not self.store_path.exists():
+            return
+
+        try:
+            with open(self.store_path, mode='r', encoding='utf-8') as f:
+                data = json.load(f)
+            workers = tuple(UsersList(*row) for row in data['workers'])
+            fetched_at = data['fetched_at']
+            stored_version = data['version']
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(
+                f'Could not read presence snapshot {self.store_path}: {e}')
+            return
+
+        # Never reuse a version a kiosk may already have rendered.
+        self._snapshot = PresenceSnapshot(
+            version=max(self._snapshot.version, stored_version))
+        self._publish(workers, fetched_at=fetched_at, stale=True)
+        logger.info(
+            f'Loaded {len(workers)} workers from {self.store_path}, '
+            f'stale until the first ERP refresh')
+
+    def _save(self, snapshot: PresenceSnapshot) -> None:
+        if self.store_path is None:
+            return
+
+        tmp_path = self.store_path.with_suffix(
+            self.store_path.suffix + '.tmp')
+        try:
+            self.store_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, mode='w', encoding='utf-8') as f:
+                json.dump({
+                    'version': snapshot.version,
+                    'fetched_at': snapshot.fetched_at,
+                    'workers': [astuple(w) for w in snapshot.workers]
+                }, f, separators=(',', ':'))
+            os.replace(tmp_path, self.store_path)
+        except OSError as e:
+            logger.warning(
+                f'Could not write presence snapshot {self.store_path}: {e}')
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.poll()
+            self._stop.wait(self.next_delay())
@@ -0,0 +1,113 @@
+import threading
+from collections import deque
+
+from api_client.base_client import UsersList
+from presence import PresenceSnapshot
+
+"""
+Presence Changes
+----------------
+
+Change feed for downstream systems (access control, canteen) that want to
+follow presence without polling the full list.
+
+Every new snapshot version is diffed against the previous one and the
+delta is kept in a bounded ring buffer. A consumer asks for the changes
+since the version it saw last and gets the net arrivals, departures and
+updates (same person, other location/department) since then, merged over
+all versions in between. A worker who came and left again in between does
+not show up at all.
+
+When the requested version has aged out of the buffer, or was never
+served by this process, the consumer gets a full resync: the complete
+current list, to be replaced wholesale.
+
+Each delta holds (old, new) pairs per worker, None meaning absent, which
+makes merging and filtering a view (location, department) simple: the
+first old and the last new record tell what happened.
+"""
+
+
+class ChangeFeed:
+    def __init__(self, initial: PresenceSnapshot, size: int = 256) -> None:
+        self._last = initial
+        # Versions before the oldest kept delta can't be served any more.
+        self._base_version = initial.version
+        self._deltas: deque[tuple[int, tuple]] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._last.version
+
+    def record(self, snapshot: PresenceSnapshot) -> None:
+        """ Stores the delta to the previous version. Poller listener. """
+        with self._lock:
+            previous = self._last
+            if snapshot.version <= previous.version:
+                return
+
+            old = {w.id_number: w for w in previous.workers}
+            new = {w.id_number: w for w in snapshot.workers}
+            delta = tuple(
+                (old.get(i), new.get(i))
+                for i in old.keys() | new.keys()
+                if old.get(i) != new.get(i)
+            )
+
+            if len(self._deltas) == self._deltas.maxlen:
+                self._base_version = self._deltas[0][0]
+            self._deltas.append((snapshot.version, delta))
+            self._last = snapshot
+
+    def changes(self, since: int | None, location=None, department=None
+                ) -> dict:
+        """
+        Net changes after version `since` for a view, or a resync with the
+        full list when `since` is unknown or too old.
+        """
+        with self._lock:
+            last = self._last
+            base = self._base_version
+            deltas = list(self._deltas)
+
+        if since is None or not base <= since <= last.version:
+            return {
+                'version': last.version,
+                'since': since,
+                'resync': True,
+                'workers': list(last.view(location, department))
+            }
+
+        net: dict[int, list] = {}
+        for version, delta in deltas:
+            if version <= since:
+                continue
+            for old, new in delta:
+                worker_id = (old or new).id_number
+                if worker_id in net:
+                    net[worker_id][1] = new
+                else:
+                    net[worker_id] = [old, new]
+
+        result = {'version': last.version, 'since': since, 'resync': False,
+                  'arrivals': [], 'departures': [], 'updated': []}
+        for old, new in net.values():
+            was_in = old is not None and _in_view(old, location, department)
+            is_in = new is not None and _in_view(new, location, department)
+            if is_in and not was_in:
+                result['arrivals'].append(new)
+            elif was_in and not is_in:
+                result['departures'].append(old)
+            elif is_in and old != new:
+                result['updated'].append(new)
+
+        for key in ('arrivals', 'departures', 'updated'):
+            result[key].sort(key=lambda w: w.name)
+        return result
+
+
+def _in_view(worker: UsersList, location, department) -> bool:
+    return ((location is None or str(worker.location) == str(location)) and
+            (department is None or
+             str(worker.department) == str(department)))
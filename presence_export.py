@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+import threading
+from datetime import datetime
+
+from api_client.base_client import UsersList
+from presence import PresenceSnapshot
+
+"""
+Presence Export
+---------------
+
+Roll-call lists of the current presence as JSON or CSV, for safety
+officers' phones during evacuation drills.
+
+A list only changes when the snapshot version changes, so each view
+(location, department) and format is serialized once per version and the
+bytes are reused for every request. The version doubles as the ETag:
+phones polling with `If-None-Match` get a `304 Not Modified` without
+anything being serialized at all.
+"""
+
+FORMATS = ('json', 'csv')
+CSV_FIELDS = ('id_number', 'name', 'location', 'department')
+
+
+class PresenceExport:
+    def __init__(self, max_views: int = 64) -> None:
+        self.max_views = max_views
+        self._version: int | None = None
+        self._cache: dict[tuple, bytes] = {}
+        self._lock = threading.Lock()
+
+    def get(self, snapshot: PresenceSnapshot, view: tuple, fmt: str
+            ) -> bytes:
+        """ Serialized list for a view, built once per snapshot version. """
+        key = (view, fmt)
+        with self._lock:
+            if snapshot.version != self._version:
+                self._cache.clear()
+                self._version = snapshot.version
+            body = self._cache.get(key)
+
+        if body is None:
+            body = serialize(snapshot, view, fmt)
+            with self._lock:
+                if (snapshot.version == self._version and
+                        len(self._cache) < self.max_views):
+                    self._cache[key] = body
+        return body
+
+
+def serialize(snapshot: PresenceSnapshot, view: tuple, fmt: str) -> bytes:
+    workers = snapshot.view(*view)
+
+    if fmt == 'csv':
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(CSV_FIELDS)
+        writer.writerows((w.id_number, w.name, w.location, w.department)
+                         for w in workers)
+        return out.getvalue().encode('utf-8')
+
+    location, department = view
+    return json.dumps({
+        'version': snapshot.version,
+        # Local time with its UTC offset.
+        'fetched_at': datetime.fromtimestamp(
+            snapshot.fetched_at).astimezone().isoformat(timespec='seconds'),
+        'stale': snapshot.stale,
+        'location': location,
+        'department': department,
+        'count': len(workers),
+        'workers': [worker_fields(w) for w in workers]
+    }, separators=(',', ':')).encode('utf-8')
+
+
+def worker_fields(worker: UsersList) -> dict:
+    """ The exported fields of a worker. """
+    return {field: getattr(worker, field) for field in CSV_FIELDS}
@@ -0,0 +1,283 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import yaml
+
+from api_client.base_client import UsersList
+from logger import logger
+from paths import data_path
+
+"""
+Presence History
+----------------
+
+Keeps a record of who was on site when, so questions like "who was here
+at 14:32?" can be answered after an incident.
+
+Every new presence snapshot is compared with the previous one and the
+differences are appended to a local SQLite database as clock-in and
+clock-out events, indexed by time and by employee. Names, locations and
+departments are stored once per person, not per event.
+
+To rebuild presence at any time without replaying a whole day, the full
+set of present ids is stored as a checkpoint every `checkpoint_seconds`.
+`present_at(t)` starts from the last checkpoint before t and replays only
+the events after it.
+
+Storage stays bounded through compaction, run once a day:
+- Events and checkpoints older than `retention_days` are dropped. A
+  checkpoint at the cutoff keeps presence right after it correct.
+- Checkpoints older than `hourly_days` are thinned out to one per day, so
+  old lookups replay at most a day of events.
+
+For a 1,000-person site this stays in the tens of MB for a year.
+
+Look up presence from the command line:
+    python presence_history.py --at "2026-10-18 14:32"
+    python presence_history.py --at "2026-10-18 14:32" --location 2
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    ts REAL NOT NULL,
+    id_number INTEGER NOT NULL,
+    arrived INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_ts_idx ON events (ts);
+CREATE INDEX IF NOT EXISTS events_person_idx ON events (id_number, ts);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    ts REAL PRIMARY KEY,
+    ids TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS persons (
+    id_number INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    location INTEGER,
+    department INTEGER
+);
+"""
+
+DAY_SECONDS = 24 * 3600
+
+
+class PresenceHistory:
+    def __init__(self, path: str | Path, retention_days: float = 90,
+                 checkpoint_seconds: float = 3600, hourly_days: float = 2
+                 ) -> None:
+        self.path = Path(path)
+        self.retention_days = retention_days
+        self.checkpoint_seconds = checkpoint_seconds
+        self.hourly_days = hourly_days
+
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        # Last recorded state, loaded from the database on first use.
+        self._present: set[int] | None = None
+        self._persons: dict[int, tuple] = {}
+        self._last_version: int | None = None
+        self._last_checkpoint = float('-inf')
+        self._last_compaction = float('-inf')
+
+    def record(self, snapshot) -> int:
+        """ Appends the changes since the last snapshot, returns the count. """
+        if snapshot.fetched_at is None or snapshot.stale:
+            return 0
+
+        ts = snapshot.fetched_at
+        current = {w.id_number: w for w in snapshot.workers}
+
+        with self._lock:
+            conn = self._connection()
+            if (self._last_version is not None and
+                    snapshot.version <= self._last_version):
+                return 0  # Listeners can run out of order, keep the newest.
+            self._last_version = snapshot.version
+
+            if self._present is None:
+                self._present = self._ids_at(conn, ts)
+            arrived = current.keys() - self._present
+            departed = self._present - current.keys()
+
+            changed = [
+                (w.id_number, w.name, w.location, w.department)
+                for w in current.values()
+                if self._persons.get(w.id_number) !=
+                (w.name, w.location, w.department)
+            ]
+
+            with conn:
+                conn.executemany(
+                    'INSERT INTO events (ts, id_number, arrived) '
+                    'VALUES (?, ?, ?)',
+                    [(ts, i, 1) for i in sorted(arrived)] +
+                    [(ts, i, 0) for i in sorted(departed)])
+                conn.executemany(
+                    'INSERT OR REPLACE INTO persons '
+                    '(id_number, name, location, department) '
+                    'VALUES (?, ?, ?, ?)', changed)
+                if ts - self._last_checkpoint >= self.checkpoint_seconds:
+                    self._checkpoint(conn, ts, current.keys())
+
+            for id_number, *attributes in changed:
+                self._persons[id_number] = tuple(attributes)
+            self._present = set(current)
+
+            if ts - self._last_compaction >= DAY_SECONDS:
+                self._compact(conn, ts)
+
+        return len(arrived) + len(departed)
+
+    def present_at(self, ts: float) -> tuple[UsersList, ...]:
+        """ Workers present at time `ts` (epoch seconds), sorted by name. """
+        with self._lock:
+            conn = self._connection()
+            ids = self._ids_at(conn, ts)
+            persons = self._persons
+
+        workers = [
+            UsersList(i, *persons.get(i, (str(i), None, 0)), status=True)
+            for i in ids
+        ]
+        return tuple(sorted(workers, key=lambda w: w.name))
+
+    def events(self, start: float, end: float,
+               id_number: int | None = None) -> list[tuple]:
+        """ (ts, id_number, arrived) events with start < ts <= end. """
+        sql = 'SELECT ts, id_number, arrived FROM events WHERE '
+        params: tuple = (start, end)
+        if id_number is None:
+            sql += 'ts > ? AND ts <= ?'
+        else:
+            sql += 'id_number = ? AND ts > ? AND ts <= ?'
+            params = (id_number, *params)
+
+        with self._lock:
+            conn = self._connection()
+            return conn.execute(sql + ' ORDER BY ts, rowid',
+                                params).fetchall()
+
+    def compact(self, now: float | None = None) -> None:
+        """ Applies retention and thins out old checkpoints. """
+        with self._lock:
+            self._compact(self._connection(), now or time.time())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use, so importing the app creates no file.
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.executescript(SCHEMA)
+            self._persons = {
+                row[0]: tuple(row[1:]) for row in conn.execute(
+                    'SELECT id_number, name, location, department '
+                    'FROM persons')}
+            last = conn.execute('SELECT MAX(ts) FROM checkpoints').fetchone()
+            if last[0] is not None:
+                self._last_checkpoint = last[0]
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _ids_at(conn: sqlite3.Connection, ts: float) -> set[int]:
+        row = conn.execute(
+            'SELECT ts, ids FROM checkpoints WHERE ts <= ? '
+            'ORDER BY ts DESC LIMIT 1', (ts,)).fetchone()
+        since, ids = (row[0], set(json.loads(row[1]))) if row else \
+            (float('-inf'), set())
+
+        for id_number, arrived in conn.execute(
+                'SELECT id_number, arrived FROM events '
+                'WHERE ts > ? AND ts <= ? ORDER BY ts, rowid', (since, ts)):
+            if arrived:
+                ids.add(id_number)
+            else:
+                ids.discard(id_number)
+        return ids
+
+    def _checkpoint(self, conn: sqlite3.Connection, ts: float, ids) -> None:
+        conn.execute('INSERT OR REPLACE INTO checkpoints (ts, ids) '
+                     'VALUES (?, ?)', (ts, json.dumps(sorted(ids))))
+        self._last_checkpoint = ts
+
+    def _compact(self, conn: sqlite3.Connection, now: float) -> None:
+        cutoff = now - self.retention_days * DAY_SECONDS
+        thin_before = now - self.hourly_days * DAY_SECONDS
+
+        with conn:
+            # Presence at the cutoff is carried over into a checkpoint before
+            # anything older goes, even when no event is older than it.
+            older = conn.execute(
+                'SELECT EXISTS (SELECT 1 FROM events WHERE ts <= ?) OR '
+                'EXISTS (SELECT 1 FROM checkpoints WHERE ts < ?)',
+                (cutoff, cutoff)).fetchone()[0]
+            if older:
+                ids = self._ids_at(conn, cutoff)
+                conn.execute('INSERT OR REPLACE INTO checkpoints (ts, ids) '
+                             'VALUES (?, ?)',
+                             (cutoff, json.dumps(sorted(ids))))
+                conn.execute('DELETE FROM events WHERE ts <= ?', (cutoff,))
+                conn.execute('DELETE FROM checkpoints WHERE ts < ?',
+                             (cutoff,))
+
+            # Keep the first checkpoint of every day.
+            conn.execute(
+                'DELETE FROM checkpoints WHERE ts < ? AND ts NOT IN ('
+                'SELECT MIN(ts) FROM checkpoints '
+                'GROUP BY CAST(ts / ? AS INTEGER))',
+                (thin_before, DAY_SECONDS))
+
+        conn.execute('PRAGMA incremental_vacuum')
+        self._last_compaction = now
+        logger.info(f'Presence history compacted ({self.path})')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Show who was on site at a given time.')
+    parser.add_argument('--at', required=True,
+                        help='Local time, e.g. "2026-10-18 14:32"')
+    parser.add_argument('--location', help='Only this location')
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--file', help='History database')
+    args = parser.parse_args()
+
+    config = {}
+    if os.path.exists(args.config):
+        with open(args.config, mode='r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+
+    path = (Path(args.file) if args.file else
+            data_path(config.get('history_file', 'data/presence_history.db')))
+    if path is None:
+        raise SystemExit('Presence history is disabled (history_file)')
+    if not path.exists():
+        raise SystemExit(f'No presence history at {path}')
+
+    at = datetime.fromisoformat(args.at)
+    workers = PresenceHistory(path).present_at(at.timestamp())
+    if args.location is not None:
+        workers = tuple(w for w in workers
+                        if str(w.location) == args.location)
+
+    print(f'{len(workers)} on site at {at:%Y-%m-%d %H:%M}')
+    for w in workers:
+        print(f'{w.id_number:>8}  {w.name:<30} location {w.location}, '
+              f'department {w.department}')
+
+
+if __name__ == '__main__':
+    main()
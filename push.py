@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+from collections.abc import Iterator
+
+from presence import PresencePoller
+
+"""
+Presence Push
+-------------
+
+Server-Sent Events stream that tells kiosks the moment the shared presence
+snapshot changes, so they don't have to wait for their next poll.
+
+Each message only carries the new snapshot version. The kiosk reacts by
+running its normal update callback, which sends the changed cards.
+
+Every open stream holds a server thread while it waits, so the number of
+concurrent streams is capped. A kiosk that is turned away, or loses its
+stream, keeps polling on the regular interval (see `assets/push.js`).
+Streams are closed after `duration` seconds and reopened by the browser,
+so dead connections are cleaned up regularly.
+"""
+
+
+class PushStreams:
+    def __init__(self, poller: PresencePoller, max_streams: int = 32,
+                 keepalive_seconds: float = 15,
+                 duration_seconds: float = 300) -> None:
+        self.poller = poller
+        self.max_streams = max_streams
+        self.keepalive_seconds = keepalive_seconds
+        self.duration_seconds = duration_seconds
+
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def open(self) -> 'EventStream | None':
+        """ Returns an event stream, or None when all slots are taken. """
+        with self._lock:
+            if self.active >= self.max_streams:
+                return None
+            self.active += 1
+        return EventStream(self)
+
+    def release(self) -> None:
+        with self._lock:
+            self.active -= 1
+
+
+class EventStream:
+    """
+    WSGI response body of a single stream. The server calls `close()` when
+    the stream ends or the kiosk disconnects, which frees the slot.
+    """
+    def __init__(self, streams: PushStreams) -> None:
+        self.streams = streams
+        self._closed = False
+
+    def __iter__(self) -> Iterator[str]:
+        streams = self.streams
+        poller = streams.poller
+
+        # Browsers reconnect after `retry` ms when the stream ends.
+        yield 'retry: 5000\n'
+        yield self._event('hello', {'keepalive': streams.keepalive_seconds})
+
+        version = poller.snapshot.version
+        yield self._event('presence', version)
+
+        deadline = time.monotonic() + streams.duration_seconds
+        while not self._closed and time.monotonic() < deadline:
+            snapshot = poller.wait_for_change(
+                version, streams.keepalive_seconds)
+
+            if snapshot.version != version:
+                version = snapshot.version
+                yield self._event('presence', version)
+            else:
+                yield self._event('ping', version)
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self.streams.release()
+
+    @staticmethod
+    def _event(name: str, data) -> str:
+        return f'event: {name}\ndata: {json.dumps(data)}\n\n'
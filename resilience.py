@@ -0,0 +1,73 @@
+import random
+import threading
+import time
+
+"""
+Resilience
+----------
+
+Helpers that keep a failing ERP from blanking the kiosks or being hammered
+by retries.
+
+- `backoff_delay`: bounded exponential backoff with full jitter, so retries
+  from several processes don't line up.
+- `CircuitBreaker`: after `failure_threshold` failed refreshes in a row the
+  circuit opens and calls are skipped for `cooldown_seconds`. After the
+  cool-down a single trial call is let through (half-open). Success closes
+  the circuit again, failure re-opens it.
+"""
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def backoff_delay(attempt: int, base_seconds: float, max_seconds: float
+                  ) -> float:
+    """ Seconds to wait before retry number `attempt` (0 based). """
+    return random.uniform(0, min(max_seconds, base_seconds * 2 ** attempt))
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 3,
+                 cooldown_seconds: float = 120) -> None:
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_count = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """ True if a call may be made now. """
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown_seconds:
+                    return False
+                self.state = HALF_OPEN
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if (self.state == HALF_OPEN or
+                    self.failures >= self.failure_threshold):
+                if self.state != OPEN:
+                    self.opened_count += 1
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+    @property
+    def remaining_cooldown(self) -> float:
+        """ Seconds until a trial call is allowed, 0 when not open. """
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.cooldown_seconds -
+                   (time.monotonic() - self._opened_at))
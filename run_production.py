@@ -1,5 +1,5 @@
 from waitress import serve
-from app import app
+from app import app, CONFIG, presence_poller, push_streams, PUSH_UPDATES
 import socket
 
 from logger import logger
@@ -21,14 +21,36 @@ The app must be accessible on the same network for connected kiosks or
 display clients to show real-time presence data via web browser.
 
 Access:
-    http://<server-ip>:8050
+    http://<server-ip>:8050  (`server_port`)
 
 Note:
 - Waitress is used as the WSGI server (pip install waitress)
 - Configuration and ERP integration is managed by the app itself
+- Each kiosk push stream holds a Waitress thread, so the thread pool is
+  sized for `push_max_streams` on top of the regular request threads
+- Waitress is tuned from the config: `server_threads`,
+  `server_connection_limit`, `server_channel_timeout_seconds` and
+  `server_backlog`. Use `benchmarks/load_kiosks.py` to find the values
+  that sustain your kiosk fleet.
 """
 
 
+def server_options(config: dict, push_streams_max: int = 0) -> dict:
+    """ Waitress `serve()` keyword arguments from the config. """
+    threads = config.get('server_threads', 4) + push_streams_max
+    return {
+        'host': config.get('server_host', '0.0.0.0'),
+        'port': config.get('server_port', 8050),
+        'threads': threads,
+        # Every thread, push stream or not, must be able to hold a
+        # connection.
+        'connection_limit': max(config.get('server_connection_limit', 100),
+                                threads),
+        'channel_timeout': config.get('server_channel_timeout_seconds', 120),
+        'backlog': config.get('server_backlog', 1024)
+    }
+
+
 def get_lan_ip():
     """ Returns the LAN IP of the current machine. """
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -45,6 +67,11 @@ def get_lan_ip():
 
 if __name__ == '__main__':
     ip = get_lan_ip()
-    port = 8050
-    logger.info(f'OnSite Presence Monitor running at: http://{ip}:{port}')
-    serve(app.server, host='0.0.0.0', port=port)
+    options = server_options(
+        CONFIG, push_streams.max_streams if PUSH_UPDATES else 0)
+    logger.info(f'OnSite Presence Monitor running at: '
+                f'http://{ip}:{options["port"]} '
+                f'({options["threads"]} threads, '
+                f'{options["connection_limit"]} connections)')
+    presence_poller.start()
+    serve(app.server, **options)
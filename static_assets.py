@@ -0,0 +1,164 @@
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import unquote, urljoin
+
+from compression import COMPRESSIBLE_TYPES, ENCODINGS, compress
+from image_index import file_stamp
+
+"""
+Static Assets
+-------------
+
+Versioned URLs and precompressed copies of the files in the assets
+directory (logo, background, stylesheet, push script, default images).
+
+`url()` returns the URL of a file with its version, e.g.
+`/assets/logo.png?v=3f2a...`: the content hash of text files, the stamp
+(mtime and size, see image_index.py) of images, which are not read for
+it. Requests for the current version can be cached by the browser for a
+year (`immutable`), so a rebooted kiosk loads the page without asking for
+a single asset again. A changed file gets a new version and therefore a
+new URL. Requests without a version, or with an old one, are revalidated
+with the ETag.
+
+Text files (CSS, JavaScript, icons) are compressed once with the strongest
+gzip/brotli settings and kept in memory. `url()` references in stylesheets
+are rewritten to hashed URLs too, so a new background image also changes
+the hash of the stylesheet that uses it.
+
+The top-level files are processed at startup with `build()`, anything
+else (e.g. employee photos without Pillow) on first request. A file is
+processed again when its mtime or size changes.
+"""
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+@dataclass(frozen=True)
+class Asset:
+    path: Path
+    digest: str
+    mimetype: str
+    # Body per encoding ('identity', 'gzip', 'br'), empty for files that
+    # are served from disk as they are.
+    bodies: dict[str, bytes] = field(default_factory=dict)
+    # (name, digest) of the assets a stylesheet refers to.
+    depends: tuple[tuple[str, str], ...] = ()
+
+
+class StaticAssets:
+    def __init__(self, directory: str | Path = 'assets',
+                 url_path: str = '/assets/') -> None:
+        # Absolute for building URLs without I/O, resolved for serving.
+        self.directory = Path(os.path.abspath(directory))
+        self._root = self.directory.resolve()
+        self.url_path = url_path
+
+        self._assets: dict[str, tuple[tuple[int, int], Asset]] = {}
+        self._lock = threading.Lock()
+
+    def build(self) -> int:
+        """ Precompresses the top-level files, returns their count. """
+        files = self.files()
+        for path in files:
+            self.get(path.name)
+        return len(files)
+
+    def files(self, suffix: str = '') -> list[Path]:
+        """ Top-level files, optionally with the given suffix, sorted. """
+        if not self.directory.is_dir():
+            return []
+        return sorted(p for p in self.directory.iterdir()
+                      if p.is_file() and p.name.endswith(suffix))
+
+    def url(self, path: str | Path, stamp: str | None = None) -> str:
+        """
+        Versioned URL of a file in the assets directory. Other paths are
+        returned unchanged. An image `stamp` known from an ImageIndex is used
+        as it is, without touching the file.
+        """
+        name = self.name(path)
+        if name is None:
+            return str(path)
+        if stamp is None:
+            asset = self.get(name)
+            if asset is None:
+                return str(path)
+            stamp = asset.digest
+        return f'{self.url_path}{name}?v={stamp}'
+
+    def name(self, path: str | Path) -> str | None:
+        """ Name of a file below the assets directory, as used in URLs. """
+        path = Path(os.path.abspath(path))
+        if not path.is_relative_to(self.directory):
+            return None
+        return path.relative_to(self.directory).as_posix()
+
+    def get(self, name: str) -> Asset | None:
+        """ Asset by its name below the directory, None if there is none. """
+        path = (self._root / name).resolve()
+        if not path.is_relative_to(self._root) or not path.is_file():
+            return None
+
+        stat = path.stat()
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._assets.get(name)
+        if cached is not None and cached[0] == key and all(
+                self._digest(dep) == digest
+                for dep, digest in cached[1].depends):
+            return cached[1]
+
+        asset = self._load(name, path, stat)
+        with self._lock:
+            self._assets[name] = (key, asset)
+        return asset
+
+    def _digest(self, name: str) -> str | None:
+        asset = self.get(name)
+        return asset.digest if asset is not None else None
+
+    def _load(self, name: str, path: Path, stat: os.stat_result) -> Asset:
+        mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if mimetype not in COMPRESSIBLE_TYPES:
+            return Asset(path, file_stamp(stat), mimetype)
+
+        data = path.read_bytes()
+        depends: tuple = ()
+        if mimetype == 'text/css':
+            data, depends = self._rewrite_css(name, data)
+
+        bodies = {'identity': data}
+        for encoding in ENCODINGS:
+            body = compress(data, encoding)
+            if len(body) < len(data):
+                bodies[encoding] = body
+
+        return Asset(path, hashlib.sha1(data).hexdigest()[:20], mimetype,
+                     bodies, depends)
+
+    def _rewrite_css(self, name: str, data: bytes) -> tuple[bytes, tuple]:
+        depends = []
+
+        def hashed(match: re.Match) -> str:
+            target = urljoin(self.url_path + name, match.group(2))
+            if not target.startswith(self.url_path) or '?' in target:
+                return match.group(0)  # External, data: or versioned
+
+            dep = unquote(target[len(self.url_path):])
+            # Stylesheets can import each other, only files are followed.
+            asset = None if dep.endswith('.css') else self.get(dep)
+            if asset is None:
+                return match.group(0)
+
+            depends.append((dep, asset.digest))
+            return f"url('{target}?v={asset.digest}')"
+
+        text = CSS_URL.sub(hashed, data.decode('utf-8'))
+        return text.encode('utf-8'), tuple(depends)
@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def presence_listeners(monkeypatch):
+    """ Keeps test snapshots out of the real presence history. """
+    import app
+
+    monkeypatch.setattr(app.presence_poller, '_listeners', [])
@@ -1,5 +1,7 @@
 from pathlib import Path
 
+import pytest
+
 from app import get_image_path
 
 def test_default_config_generation(tmp_path):
@@ -18,3 +20,266 @@ def test_image_path_fallback():
 
     assert fallback_path.exists(), 'Default fallback image missing'
     assert get_image_path(fake_id) == 'assets/default.png'
+
+
+def test_thumbnail_route_serves_cacheable_image(tmp_path, monkeypatch):
+    import app
+
+    if not app.thumbnail_cache.available:
+        pytest.skip('Pillow not installed')
+
+    monkeypatch.setattr(app.thumbnail_cache, 'directory', tmp_path)
+    client = app.server.test_client()
+
+    response = client.get('/thumbnails/4001',
+                          headers={'Accept': 'image/webp,*/*'})
+
+    assert response.status_code == 200
+    assert response.mimetype in ('image/webp', 'image/png')
+    assert 'max-age' in response.headers['Cache-Control']
+    assert response.headers.get('ETag')
+
+
+def test_thumbnail_route_rejects_keys_that_are_not_worker_ids():
+    import app
+
+    client = app.server.test_client()
+
+    assert client.get('/thumbnails/4001.jpg').status_code == 404
+    assert client.get('/thumbnails/tom').status_code == 404
+
+
+def apply_patch(children, patch):
+    """ Applies Patch delete/insert operations like the Dash renderer. """
+    children = list(children)
+    for op in patch.to_plotly_json()['operations']:
+        if op['operation'] == 'Delete':
+            del children[op['location'][0]]
+        elif op['operation'] == 'Insert':
+            children.insert(op['params']['index'], op['params']['value'])
+    return children
+
+
+def test_diff_workers_only_sends_changed_cards():
+    from api_client.base_client import UsersList
+    from app import diff_workers, render_workers
+    from presence import PresenceSnapshot
+
+    def worker(i):
+        return UsersList(id_number=i, name=f'Worker {i}', location=1,
+                         department=0, status=True)
+
+    before = PresenceSnapshot(1, tuple(worker(i) for i in (1, 2, 3, 4)),
+                              fetched_at=0.0)
+    after = PresenceSnapshot(2, tuple(worker(i) for i in (1, 3, 5, 4, 6)),
+                             fetched_at=0.0)
+
+    patch = diff_workers(before.workers, after.workers)
+    operations = patch.to_plotly_json()['operations']
+    result = apply_patch(render_workers(before, (None, None)), patch)
+
+    assert len(operations) == 3  # Remove 2, insert 5 and 6
+    assert ([c.children[-1].children for c in result] ==
+            [c.children[-1].children
+             for c in render_workers(after, (None, None))])
+
+
+def test_diff_workers_needs_full_render_from_empty():
+    from app import diff_workers
+    from presence import PresenceSnapshot
+
+    assert diff_workers((), PresenceSnapshot(2).workers) is None
+
+
+def test_parse_view():
+    from app import LOCATION, parse_view
+
+    assert parse_view('') == (LOCATION, None)
+    assert parse_view('?location=2') == ('2', None)
+    assert parse_view('?location=all&department=5') == (None, '5')
+
+
+def test_stale_banner_only_when_stale():
+    from app import render_status
+    from presence import PresenceSnapshot
+
+    assert render_status(PresenceSnapshot(1, fetched_at=0.0)) == ''
+    banner = render_status(PresenceSnapshot(2, fetched_at=0.0, stale=True))
+    assert banner.className == 'stale-banner'
+
+
+def test_stale_banner_shows_date_when_not_today():
+    import time
+    from datetime import datetime
+
+    from app import format_fetched_at
+
+    three_days_ago = time.time() - 3 * 24 * 3600
+
+    assert len(format_fetched_at(time.time())) == len('14:05')
+    assert format_fetched_at(three_days_ago) == \
+        datetime.fromtimestamp(three_days_ago).strftime('%d.%m %H:%M')
+
+
+def test_presence_export_conditional_get(monkeypatch):
+    import app
+    from api_client.base_client import UsersList
+    from presence import PresenceSnapshot
+
+    snapshot = PresenceSnapshot(
+        version=7, workers=(UsersList(4001, 'Tom Harnes', 1, 3, True),),
+        fetched_at=1_767_600_000.0)
+    monkeypatch.setattr(app.presence_poller, 'start', lambda: None)
+    monkeypatch.setattr(app.presence_poller, '_snapshot', snapshot)
+    client = app.server.test_client()
+
+    first = client.get('/api/presence.csv?location=all')
+    again = client.get('/api/presence.csv?location=all',
+                       headers={'If-None-Match': first.headers['ETag']})
+
+    assert first.status_code == 200
+    assert b'Tom Harnes' in first.data
+    assert again.status_code == 304
+    assert again.data == b''
+    assert first.last_modified.timestamp() == 1_767_600_000.0
+
+
+def test_presence_export_unavailable_before_first_fetch(monkeypatch):
+    import app
+    from presence import PresenceSnapshot
+
+    monkeypatch.setattr(app.presence_poller, 'start', lambda: None)
+    monkeypatch.setattr(app.presence_poller, '_snapshot',
+                        PresenceSnapshot(version=1))
+
+    response = app.server.test_client().get('/api/presence')
+
+    assert response.status_code == 503
+
+
+def test_presence_changes_route(monkeypatch):
+    import app
+    from api_client.base_client import UsersList
+    from presence import PresenceSnapshot
+    from presence_changes import ChangeFeed
+
+    before = PresenceSnapshot(version=7, fetched_at=1_767_600_000.0)
+    after = PresenceSnapshot(
+        version=8, workers=(UsersList(4001, 'Tom Harnes', 1, 3, True),),
+        fetched_at=1_767_600_010.0)
+    feed = ChangeFeed(before)
+    feed.record(after)
+    monkeypatch.setattr(app, 'change_feed', feed)
+    monkeypatch.setattr(app.presence_poller, 'start', lambda: None)
+    monkeypatch.setattr(app.presence_poller, '_snapshot', after)
+    client = app.server.test_client()
+
+    changes = client.get('/api/presence/changes?since=7&location=all')
+
+    assert changes.get_json()['arrivals'] == [
+        {'id_number': 4001, 'name': 'Tom Harnes', 'location': 1,
+         'department': 3}]
+    assert client.get('/api/presence/changes?location=all'
+                      ).get_json()['resync']
+    assert client.get('/api/presence/changes?since=x').status_code == 400
+
+
+def test_hashed_assets_cached_for_good():
+    import app
+
+    client = app.server.test_client()
+    url = app.static_assets.url('assets/style.css')
+
+    hashed = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    plain = client.get('/assets/style.css')
+
+    assert hashed.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in hashed.headers['Cache-Control']
+    assert plain.headers['Cache-Control'] == 'no-cache'
+    assert client.get(url, headers={
+        'Accept-Encoding': 'gzip',
+        'If-None-Match': hashed.headers['ETag']}).status_code == 304
+
+
+def test_large_roster_sends_one_page_and_rotates(monkeypatch):
+    import app
+    from api_client.base_client import UsersList
+    from benchmarks.bench_refresh import callback_body
+    from presence import PresenceSnapshot
+
+    workers = tuple(UsersList(i, f'Worker {i:02}', 1, i % 2, True)
+                    for i in range(1, 11))
+    snapshot = PresenceSnapshot(7, workers, fetched_at=0.0)
+    monkeypatch.setattr(app.presence_poller, 'start', lambda: None)
+    monkeypatch.setattr(app.presence_poller, '_snapshot', snapshot)
+    monkeypatch.setattr(app, 'GROUP_DEPARTMENTS', True)
+    client = app.server.test_client()
+
+    def call(page, rotate):
+        return client.post('/_dash-update-component', json=callback_body(
+            7 if rotate else None, '?location=all&page_size=4', page,
+            rotate)).get_json()['response']
+
+    first = call(None, rotate=False)
+    rotated = call(2, rotate=True)
+
+    cards = first['worker-container']['children']
+    assert [c['props']['className'] for c in cards[:2]] == [
+        'department-heading', 'card']
+    assert len([c for c in cards if c['props']['className'] == 'card']) == 4
+    assert first['page-indicator']['children'] == '1 / 3'
+    assert first['page-interval']['disabled'] is False
+    assert rotated['rendered-page']['data'] == 0  # Wrapped around
+
+
+def test_card_thumbnail_url_versioned_by_index_stamp(tmp_path, monkeypatch):
+    import app
+
+    if not app.thumbnail_cache.available:
+        pytest.skip('Pillow not installed')
+
+    monkeypatch.setattr(app.thumbnail_cache, 'directory', tmp_path)
+    url = app.get_card_image_url(4001)
+    path = app.image_index.lookup(4001)
+
+    response = app.server.test_client().get('/' + url)
+
+    assert url == f'thumbnails/4001?v={app.image_index.stamp(path)}'
+    assert 'immutable' in response.headers['Cache-Control']
+
+
+def test_card_image_url_counts_image_lookups(monkeypatch):
+    import app
+    import metrics
+
+    monkeypatch.setattr(metrics, 'enabled', True)
+    monkeypatch.setattr(metrics.IMAGE_LOOKUPS, '_values', {})
+    app.get_card_image_url(4001)
+
+    assert metrics.IMAGE_LOOKUPS.samples()
+
+
+def test_changed_query_renders_although_version_is_current(monkeypatch):
+    import app
+    from api_client.base_client import UsersList
+    from benchmarks.bench_refresh import callback_body
+    from presence import PresenceSnapshot
+
+    snapshot = PresenceSnapshot(7, (UsersList(4001, 'Tom Harnes', 2, 3,
+                                              True),), fetched_at=0.0)
+    monkeypatch.setattr(app.presence_poller, 'start', lambda: None)
+    monkeypatch.setattr(app.presence_poller, '_snapshot', snapshot)
+    client = app.server.test_client()
+
+    def call(body):
+        return client.post('/_dash-update-component', json=body).get_json()
+
+    body = callback_body(7, '?location=2')
+    unchanged = call(body)
+    body['inputs'][-1]['value'] = '?location=all'
+    changed = call(body)['response']
+
+    assert unchanged['response'] == {}
+    assert changed['rendered-version']['data'] == {
+        'version': 7, 'search': '?location=all'}
+    assert len(changed['worker-container']['children']) == 1
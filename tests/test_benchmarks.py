@@ -0,0 +1,78 @@
+import time
+
+from benchmarks.bench_refresh import compare, run, summarize
+from benchmarks.fake_g5_server import make_roster
+
+
+def test_make_roster_size_and_presence():
+    persons, attendance = make_roster(200, present_ratio=0.5)
+
+    assert len(persons) == len(attendance) == 200
+    assert 50 < sum(not a['IsClosedInterval'] for a in attendance) < 150
+
+
+def test_benchmark_runs_every_step():
+    result = run([20], repeat=1, latency=0)
+
+    steps = result['results'][0]
+    for step in ('get_workers_cold', 'get_workers_warm', 'render_workers',
+                 'callback_full', 'callback_patch', 'callback_unchanged'):
+        assert steps[step]['runs'] == 1
+    assert steps['present'] > 0
+    assert steps['peak_memory_bytes']['callback_full'] > 0
+
+
+def test_compare_reports_slower_steps():
+    baseline = {'results': [{'roster_size': 100,
+                             'render_workers': summarize([0.010])}]}
+    current = {'results': [{'roster_size': 100,
+                            'render_workers': summarize([0.020])}]}
+
+    assert len(compare(current, baseline, threshold=1.25)) == 1
+    assert compare(baseline, baseline, threshold=1.25) == []
+
+
+def test_image_urls_found_in_full_render_and_patch():
+    from benchmarks.load_kiosks import image_urls
+
+    card = {'type': 'Div', 'namespace': 'dash_html_components', 'props': {
+        'children': [{'type': 'Img', 'props': {'src': 'thumbnails/4001'}},
+                     {'type': 'P', 'props': {'children': 'Tom Harnes'}}]}}
+    patch = {'__dash_patch_update': '__dash_patch_update', 'operations': [
+        {'operation': 'Insert', 'location': [],
+         'params': {'index': 0, 'value': card}}]}
+
+    assert image_urls({'worker-container': {'children': [card]}}) == \
+        {'thumbnails/4001'}
+    assert image_urls({'worker-container': {'children': patch}}) == \
+        {'thumbnails/4001'}
+
+
+def test_streaming_kiosk_waits_for_push_instead_of_interval():
+    import threading
+
+    from benchmarks.load_kiosks import Kiosk, Recorder
+
+    kiosk = Kiosk('http://127.0.0.1:1', '', interval=0, image_pool=None,
+                  streams=True, recorder=Recorder(), stop=threading.Event(),
+                  number=0)
+    kiosk.streaming = True
+    threading.Timer(0.2, kiosk.pushed.set).start()
+
+    started = time.perf_counter()
+    kiosk.wait()
+
+    assert time.perf_counter() - started >= 0.2
+    assert not kiosk.pushed.is_set()
+
+
+def test_benchmark_keeps_roster_out_of_listeners():
+    import app
+
+    seen = []
+    app.presence_poller.add_listener(seen.append)
+
+    run([20], repeat=1, latency=0)
+
+    assert seen == []
+    assert app.presence_poller._listeners == [seen.append]
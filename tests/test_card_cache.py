@@ -0,0 +1,70 @@
+from card_cache import CardCache
+
+
+class Builder:
+    def __init__(self):
+        self.built = []
+        self.generation = 1
+
+    def build(self, worker):
+        self.built.append(worker)
+        return {'card': worker}
+
+
+def make_cache(max_size=2048):
+    builder = Builder()
+    cache = CardCache(builder.build, lambda: builder.generation,
+                      max_size=max_size)
+    return cache, builder
+
+
+def test_card_is_built_once():
+    cache, builder = make_cache()
+
+    first = cache.get((1, 'Tom Harnes', 3), 'tom')
+    second = cache.get((1, 'Tom Harnes', 3), 'tom')
+
+    assert first is second
+    assert builder.built == ['tom']
+
+
+def test_changed_worker_gets_a_new_card():
+    cache, builder = make_cache()
+
+    cache.get((1, 'Tom Harnes', 3), 'tom')
+    cache.get((1, 'Tom Harnes', 4), 'tom moved')
+
+    assert builder.built == ['tom', 'tom moved']
+
+
+def test_generation_change_drops_cached_cards():
+    cache, builder = make_cache()
+    cache.get((1, 'Tom Harnes', 3), 'tom')
+
+    builder.generation = 2
+    cache.get((1, 'Tom Harnes', 3), 'tom')
+
+    assert builder.built == ['tom', 'tom']
+
+
+def test_least_recently_used_card_is_evicted():
+    cache, builder = make_cache(max_size=2)
+    cache.get('a', 'a')
+    cache.get('b', 'b')
+    cache.get('a', 'a')
+    cache.get('c', 'c')
+
+    cache.get('a', 'a')
+    cache.get('b', 'b')
+
+    assert len(cache) == 2
+    assert builder.built == ['a', 'b', 'c', 'b']
+
+
+def test_size_zero_disables_caching():
+    cache, builder = make_cache(max_size=0)
+    cache.get('a', 'a')
+    cache.get('a', 'a')
+
+    assert builder.built == ['a', 'a']
+    assert len(cache) == 0
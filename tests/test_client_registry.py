@@ -0,0 +1,42 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from api_client import create_client, load_client_class, register_client
+from api_client.mock_client import MockERPClient
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_builtin_client_by_name():
+    assert load_client_class('mock') is MockERPClient
+
+
+def test_client_by_module_path():
+    assert load_client_class(
+        'api_client.mock_client:MockERPClient') is MockERPClient
+
+
+def test_registered_client():
+    register_client('test_mock', 'api_client.mock_client:MockERPClient')
+
+    assert isinstance(create_client('test_mock'), MockERPClient)
+
+
+def test_unknown_client_is_rejected():
+    with pytest.raises(ValueError, match='Unknown ERP client'):
+        load_client_class('sap')
+
+
+def test_g5_client_does_not_import_pandas():
+    # Fresh interpreter, the test session has pandas loaded already.
+    result = subprocess.run(
+        [sys.executable, '-c',
+         'import sys, api_client; '
+         'api_client.load_client_class("monitor_g5"); '
+         'print("pandas" in sys.modules)'],
+        cwd=ROOT, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == 'False'
@@ -0,0 +1,41 @@
+import gzip
+
+from flask import Response
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+from compression import compress_response, negotiate
+
+
+def accept(header):
+    return parse_accept_header(header, Accept)
+
+
+def test_negotiate_prefers_accepted_encoding():
+    assert negotiate(accept('gzip, deflate'), ('gzip',)) == 'gzip'
+    assert negotiate(accept('gzip;q=0'), ('gzip',)) == 'identity'
+    assert negotiate(accept('gzip'), ('identity',)) == 'identity'
+
+
+def test_json_response_compressed_with_weak_etag():
+    body = b'{"cards":[' + b'{"name":"Tom Harnes"},' * 200 + b'{}]}'
+    response = Response(body, mimetype='application/json')
+    response.set_etag('7-json')
+
+    compress_response(response, accept('gzip'))
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    assert gzip.decompress(response.get_data()) == body
+    assert response.get_etag() == ('7-json', True)
+
+
+def test_small_streamed_and_binary_responses_left_alone():
+    small = Response(b'{}', mimetype='application/json')
+    stream = Response(iter([b'data: 1\n\n'] * 1000),
+                      mimetype='text/event-stream')
+    image = Response(b'\x89PNG' * 1000, mimetype='image/png')
+
+    for response in (small, stream, image):
+        compress_response(response, accept('gzip'))
+        assert 'Content-Encoding' not in response.headers
@@ -0,0 +1,102 @@
+import os
+
+from image_index import ImageIndex
+
+EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+
+
+def make_index(directory, **kwargs):
+    return ImageIndex(directory, default='default.png',
+                      extensions=EXTENSIONS, **kwargs)
+
+
+def test_exact_match_follows_extension_order(tmp_path):
+    (tmp_path / '4001.jpg').touch()
+    (tmp_path / '4001.png').touch()
+
+    index = make_index(tmp_path)
+
+    assert index.lookup(4001) == str(tmp_path / '4001.png')
+
+
+def test_partial_match_and_fallback(tmp_path):
+    (tmp_path / 'emp_4002.webp').touch()
+    (tmp_path / '4003.txt').touch()
+
+    index = make_index(tmp_path)
+
+    assert index.lookup(4002) == str(tmp_path / 'emp_4002.webp')
+    assert index.lookup(4003) == 'default.png'
+
+
+def test_partial_match_can_be_disabled(tmp_path):
+    (tmp_path / 'dept_7.png').touch()
+
+    index = make_index(tmp_path, partial=False)
+
+    assert index.lookup(7) == 'default.png'
+
+
+def test_missing_directory_uses_default(tmp_path):
+    index = make_index(tmp_path / 'offline-share')
+
+    assert index.lookup(4001) == 'default.png'
+
+
+def test_lookup_does_no_io_until_directory_changes(tmp_path, monkeypatch):
+    index = make_index(tmp_path)
+    assert index.lookup(4001) == 'default.png'
+
+    def fail(*_):
+        raise AssertionError('filesystem accessed during lookup')
+
+    monkeypatch.setattr('image_index.os.stat', fail)
+    assert index.lookup(4001) == 'default.png'
+    monkeypatch.undo()
+
+    (tmp_path / '4001.png').touch()
+    stat = os.stat(tmp_path)
+    os.utime(tmp_path, (stat.st_atime, stat.st_mtime + 10))
+
+    assert index.refresh() is True
+    assert index.lookup(4001) == str(tmp_path / '4001.png')
+    assert index.refresh() is False
+
+
+def test_file_replaced_in_place_changes_stamp_and_version(tmp_path):
+    photo = tmp_path / '4001.png'
+    photo.write_bytes(b'old photo')
+    index = make_index(tmp_path, sweep_seconds=0)
+    stamp, version = index.stamp(index.lookup(4001)), index.version
+
+    photo.write_bytes(b'new photo, same name')
+
+    assert index.refresh() is True
+    assert index.version != version
+    assert index.stamp(index.lookup(4001)) not in (None, stamp)
+    assert index.stamp('default.png') is None
+
+
+def test_unchanged_directory_is_not_listed_between_sweeps(tmp_path,
+                                                         monkeypatch):
+    (tmp_path / '4001.png').write_bytes(b'photo')
+    index = make_index(tmp_path)
+    index.lookup(4001)
+
+    def fail(*_):
+        raise AssertionError('directory listed although unchanged')
+
+    monkeypatch.setattr('image_index.os.scandir', fail)
+    (tmp_path / '4001.png').write_bytes(b'photo replaced in place')
+
+    assert index.refresh() is False
+
+
+def test_memoized_lookups_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr('image_index.MAX_MEMOIZED', 2)
+    index = make_index(tmp_path)
+
+    for key in range(5):
+        index.lookup(key)
+
+    assert len(index._state[2]) == 2
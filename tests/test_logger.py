@@ -0,0 +1,40 @@
+import logging
+
+from logger import AccessAggregateFilter, AccessDefaultsFilter
+
+
+def make_record(created, client_ip='10.0.0.5'):
+    record = logging.LogRecord('OnSitePresence.access', logging.INFO,
+                               __file__, 0, 'refresh', None, None)
+    record.created = created
+    record.client_ip = client_ip
+    record.path = '/refresh'
+    AccessDefaultsFilter().filter(record)
+    return record
+
+
+def test_one_access_line_per_kiosk_per_window():
+    aggregate = AccessAggregateFilter(window_seconds=60)
+
+    passed = [aggregate.filter(make_record(t)) for t in range(0, 120, 10)]
+
+    assert passed == [True] + [False] * 5 + [True] + [False] * 5
+
+
+def test_passed_line_counts_requests_since_previous():
+    aggregate = AccessAggregateFilter(window_seconds=60)
+    aggregate.filter(make_record(0))
+    for t in (10, 20, 30):
+        aggregate.filter(make_record(t))
+
+    record = make_record(61)
+    assert aggregate.filter(record)
+    assert record.count == 4
+
+
+def test_kiosks_are_aggregated_separately():
+    aggregate = AccessAggregateFilter(window_seconds=60)
+
+    assert aggregate.filter(make_record(0, client_ip='10.0.0.5'))
+    assert aggregate.filter(make_record(1, client_ip='10.0.0.6'))
+    assert not aggregate.filter(make_record(2, client_ip='10.0.0.5'))
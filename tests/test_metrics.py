@@ -0,0 +1,99 @@
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(metrics, 'enabled', True)
+
+
+def test_disabled_metrics_record_nothing(monkeypatch):
+    monkeypatch.setattr(metrics, 'enabled', False)
+    histogram = metrics.Histogram('test_disabled_seconds', 'test')
+    counter = metrics.Counter('test_disabled_total', 'test')
+
+    histogram.observe(0.2)
+    with histogram.time():
+        pass
+    counter.inc()
+
+    assert histogram.samples() == []
+    assert counter.samples() == []
+
+
+def test_histogram_buckets_are_cumulative(enabled):
+    histogram = metrics.Histogram('test_latency_seconds', 'test',
+                                  buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value, endpoint='persons')
+
+    samples = histogram.samples()
+
+    assert 'test_latency_seconds_bucket{endpoint="persons",le="0.1"} 1' \
+        in samples
+    assert 'test_latency_seconds_bucket{endpoint="persons",le="1"} 2' \
+        in samples
+    assert 'test_latency_seconds_bucket{endpoint="persons",le="+Inf"} 3' \
+        in samples
+    assert 'test_latency_seconds_count{endpoint="persons"} 3' in samples
+
+
+def test_counter_by_labels(enabled):
+    counter = metrics.Counter('test_lookups_total', 'test')
+    counter.inc(result='hit')
+    counter.inc(result='hit')
+    counter.inc(result='miss')
+
+    assert sorted(counter.samples()) == [
+        'test_lookups_total{result="hit"} 2',
+        'test_lookups_total{result="miss"} 1'
+    ]
+
+
+def test_gauge_without_value_is_omitted():
+    gauge = metrics.Gauge('test_age_seconds', 'test')
+    gauge.set_function(lambda: None)
+
+    assert gauge.samples() == []
+
+
+def test_active_clients_expire(enabled, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(metrics.time, 'monotonic', lambda: now[0])
+    clients = metrics.ActiveClients(window_seconds=60)
+
+    clients.seen('10.0.0.5', 'Chrome')
+    clients.seen('10.0.0.5', 'Chrome')
+    clients.seen('10.0.0.6', 'Chrome')
+    assert clients.count() == 2
+
+    now[0] += 61
+    assert clients.count() == 0
+
+
+def test_metrics_endpoint(enabled):
+    import app
+    from api_client.base_client import UsersList
+
+    client = app.server.test_client()
+    app.render_workers(app.PresenceSnapshot(
+        version=1, workers=(UsersList(1, 'Ola Nordmann', 1, 1, True),),
+        fetched_at=0.0), view=(None, None))
+
+    response = client.get('/metrics')
+    body = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert '# TYPE onsite_erp_login_seconds histogram' in body
+    assert 'onsite_card_build_seconds_count' in body
+    assert 'onsite_render_workers_seconds_count' in body
+
+
+def test_metrics_endpoint_hidden_when_disabled(monkeypatch):
+    import app
+
+    monkeypatch.setattr(metrics, 'enabled', False)
+
+    assert app.server.test_client().get('/metrics').status_code == 404
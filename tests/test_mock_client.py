@@ -1,3 +1,4 @@
+import os
 from datetime import datetime
 
 import pandas as pd
@@ -24,3 +25,60 @@ def test_get_workers_active_status():
         row = match.iloc[0]
         expected_status = (row['clocked_in'] <= now <= row['clocked_out'])
         assert worker.status == expected_status
+
+
+def write_roster(path, rows):
+    lines = ['id_number,name,location,clocked_in,clocked_out']
+    lines += [','.join(map(str, row)) for row in rows]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+def test_custom_sample_data_path(tmp_path):
+    path = tmp_path / 'roster.csv'
+    write_roster(path, [(1, 'Day Shift', 'Factory', '00:00', '23:59')])
+
+    workers = MockERPClient(path).get_workers()
+
+    assert len(workers) == 1
+    assert workers[0].name == 'Day Shift'
+    assert workers[0].status
+    assert workers[0].department == 0
+
+
+def test_csv_only_reloaded_when_changed(tmp_path, monkeypatch):
+    path = tmp_path / 'roster.csv'
+    write_roster(path, [(1, 'Always', 'Factory', '00:00', '23:59')])
+    client = MockERPClient(path)
+    client.get_workers()
+
+    reads = []
+    original = pd.read_csv
+    monkeypatch.setattr('api_client.mock_client.pd.read_csv',
+                        lambda *a, **kw: reads.append(a) or original(*a, **kw))
+
+    client.get_workers()
+    assert reads == []
+
+    write_roster(path, [(1, 'Always', 'Factory', '00:00', '23:59'),
+                        (2, 'Never', 'Factory', '00:00', '00:00')])
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    workers = client.get_workers()
+    assert len(reads) == 1
+    assert [w.status for w in workers] == [True, False]
+
+
+def test_next_change_from_schedule(tmp_path):
+    path = tmp_path / 'roster.csv'
+    write_roster(path, [(1, 'Day', 'Factory', '06:00', '14:00'),
+                        (2, 'Sick', 'Factory', 'sick', 'sick')])
+    client = MockERPClient(path)
+
+    assert client.next_change(datetime(2026, 1, 1, 5, 30)) == \
+        datetime(2026, 1, 1, 6, 0)
+    # Clocked out is inclusive, presence ends after 14:00
+    assert client.next_change(datetime(2026, 1, 1, 13, 0)) == \
+        datetime(2026, 1, 1, 14, 1)
+    assert client.next_change(datetime(2026, 1, 1, 20, 0)) == \
+        datetime(2026, 1, 2, 6, 0)
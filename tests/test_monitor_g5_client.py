@@ -1,14 +1,17 @@
+import time
 from unittest.mock import patch, MagicMock
 
 import pytest
 
 from api_client.monitor_g5_client import MonitorG5Client
+from benchmarks.fake_g5_server import FakeG5Server
 
 GOOD_CONFIG = {
     'erp_api_url': 'https://testhost:8001/no/001.1/',
     'erp_api_user': 'dummy',
     'erp_api_key': 'dummy',
-    'location': 'Factory'
+    'location': 'Factory',
+    'persons_cache_file': ''
 }
 
 
@@ -92,3 +95,210 @@ def test_invalid_api_url(monkeypatch):
 
     with pytest.raises(ValueError):
         MonitorG5Client()
+
+
+def make_response(status_code=200, payload=None, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload if payload is not None else []
+    response.headers = headers or {}
+    return response
+
+
+@patch('api_client.monitor_g5_client.requests.Session.get')
+@patch('api_client.monitor_g5_client.requests.Session.post')
+def test_session_is_reused_between_refreshes(mock_post, mock_get):
+    mock_post.return_value = make_response(
+        headers={'x-monitor-sessionid': 'SESSION-1'})
+    mock_get.return_value = make_response()
+
+    client = MonitorG5Client()
+    client.get_workers()
+    client.get_workers()
+
+    assert mock_post.call_count == 1
+    assert client.session.headers['x-monitor-sessionid'] == 'SESSION-1'
+    assert client.stats()['logins'] == 1
+    assert client.stats()['refreshes'] == 2
+
+
+@patch('api_client.monitor_g5_client.requests.Session.get')
+@patch('api_client.monitor_g5_client.requests.Session.post')
+def test_expired_session_relogs_and_retries_once(mock_post, mock_get):
+    mock_post.side_effect = [
+        make_response(headers={'x-monitor-sessionid': 'SESSION-1'}),
+        make_response(headers={'x-monitor-sessionid': 'SESSION-2'}),
+    ]
+    mock_get.side_effect = [
+        make_response(status_code=401),
+        make_response(payload=[{'EmployeeId': 10}]),
+    ]
+
+    client = MonitorG5Client()
+    client.authenticate()
+    result = client._fetch_attendance_chart()
+
+    assert result == [{'EmployeeId': 10}]
+    assert mock_post.call_count == 2
+    assert mock_get.call_count == 2
+    assert client.session_id == 'SESSION-2'
+
+
+def test_persons_and_attendance_are_fetched_concurrently():
+    delay = 0.4
+    persons = [
+        {'Id': 10, 'EmployeeNumber': 4001, 'FirstName': 'Tom',
+         'LastName': 'Harnes', 'WarehouseId': 1, 'DepartmentId': 3},
+    ]
+    attendance = [{'EmployeeId': 10, 'IsClosedInterval': False}]
+    delays = {
+        '/api/v1/Common/Persons': delay,
+        '/api/v1/TimeRecording/AttendanceChart': delay,
+    }
+
+    with FakeG5Server(persons, attendance, delays) as server:
+        client = MonitorG5Client()
+        client.api_url = server.url
+
+        started = time.perf_counter()
+        workers = client.get_workers()
+        elapsed = time.perf_counter() - started
+
+    assert [w.id_number for w in workers] == [4001]
+    assert server.logins == 1
+    # Sequential fetching would take at least 2 * delay.
+    assert elapsed < 2 * delay
+
+
+PERSONS = [
+    {'Id': 10, 'EmployeeNumber': 4001, 'FirstName': 'Tom',
+     'LastName': 'Harnes', 'WarehouseId': 1, 'DepartmentId': 3},
+]
+
+
+def test_persons_are_cached_between_refreshes():
+    attendance = [{'EmployeeId': 10, 'IsClosedInterval': False}]
+
+    with FakeG5Server(PERSONS, attendance) as server:
+        client = MonitorG5Client()
+        client.api_url = server.url
+
+        client.get_workers()
+        client.get_workers()
+
+    assert server.requests.count('/api/v1/Common/Persons') == 1
+    assert server.requests.count('/api/v1/TimeRecording/AttendanceChart') == 2
+
+
+def test_unknown_employee_triggers_persons_refetch():
+    attendance = [{'EmployeeId': 10, 'IsClosedInterval': False}]
+
+    with FakeG5Server(PERSONS, attendance) as server:
+        client = MonitorG5Client()
+        client.api_url = server.url
+        client.get_workers()
+
+        # A new hire clocks in and shows up in Persons at the same time.
+        server.persons = PERSONS + [
+            {'Id': 11, 'EmployeeNumber': 4002, 'FirstName': 'Jane',
+             'LastName': 'Doe', 'WarehouseId': 1, 'DepartmentId': 3},
+        ]
+        server.attendance = attendance + [
+            {'EmployeeId': 11, 'IsClosedInterval': False}]
+
+        workers = client.get_workers()
+
+    assert {w.id_number for w in workers} == {4001, 4002}
+    assert server.requests.count('/api/v1/Common/Persons') == 2
+
+
+def test_every_new_hire_refetches_once():
+    attendance = [{'EmployeeId': 10, 'IsClosedInterval': False}]
+
+    with FakeG5Server(PERSONS, attendance) as server:
+        client = MonitorG5Client()
+        client.api_url = server.url
+        client.get_workers()
+
+        for pid, number in ((11, 4002), (12, 4003)):
+            server.persons = server.persons + [
+                {'Id': pid, 'EmployeeNumber': number, 'FirstName': 'New',
+                 'LastName': f'Hire {pid}', 'DepartmentId': 3}]
+            server.attendance = server.attendance + [
+                {'EmployeeId': pid, 'IsClosedInterval': False}]
+            workers = client.get_workers()
+
+        # Never in Persons: refetches once, not on every refresh.
+        server.attendance = server.attendance + [
+            {'EmployeeId': 99, 'IsClosedInterval': False}]
+        client.get_workers()
+        client.get_workers()
+
+    assert {w.id_number for w in workers} == {4001, 4002, 4003}
+    assert [w.location for w in workers if w.id_number == 4003] == [None]
+    assert server.requests.count('/api/v1/Common/Persons') == 4
+
+
+def test_persons_cache_survives_restart(tmp_path, monkeypatch):
+    config = dict(GOOD_CONFIG, persons_cache_file=str(tmp_path / 'p.json'))
+    monkeypatch.setattr(
+        'api_client.monitor_g5_client.yaml.safe_load', lambda *_: config)
+    attendance = [{'EmployeeId': 10, 'IsClosedInterval': False}]
+
+    with FakeG5Server(PERSONS, attendance) as server:
+        first = MonitorG5Client()
+        first.api_url = server.url
+        first.get_workers()
+
+        second = MonitorG5Client()
+        second.api_url = server.url
+        workers = second.get_workers()
+
+    assert second.persons_cache.is_fresh
+    assert workers[0].name == 'Tom Harnes'
+    assert server.requests.count('/api/v1/Common/Persons') == 1
+
+
+def test_failed_persons_fetch_keeps_stale_directory():
+    attendance = [{'EmployeeId': 10, 'IsClosedInterval': False}]
+
+    with FakeG5Server(PERSONS, attendance) as server:
+        client = MonitorG5Client()
+        client.api_url = server.url
+        client.get_workers()
+
+        client.persons_cache.fetched_at = 0  # TTL expired
+        with patch.object(client, '_fetch_persons',
+                          side_effect=RuntimeError('Persons down')):
+            workers = client.get_workers()
+
+    assert [w.name for w in workers] == ['Tom Harnes']
+
+
+@patch('api_client.monitor_g5_client.MonitorG5Client.authenticate')
+@patch('api_client.monitor_g5_client.MonitorG5Client._fetch_attendance_chart')
+@patch('api_client.monitor_g5_client.MonitorG5Client._fetch_persons')
+def test_failed_persons_fetch_without_directory_raises(mock_persons,
+                                                       mock_attendance,
+                                                       mock_auth):
+    mock_persons.side_effect = RuntimeError('Persons down')
+    mock_attendance.return_value = []
+
+    with pytest.raises(RuntimeError):
+        MonitorG5Client().get_workers()
+
+
+def test_unknown_employee_is_warned_about_once(caplog):
+    attendance = [{'EmployeeId': 10, 'IsClosedInterval': False},
+                  {'EmployeeId': 99, 'IsClosedInterval': False}]
+
+    with FakeG5Server(PERSONS, attendance) as server:
+        client = MonitorG5Client()
+        client.api_url = server.url
+        with caplog.at_level('DEBUG'):
+            for _ in range(3):
+                client.get_workers()
+
+    warnings = [r for r in caplog.records
+                if 'No person info' in r.message and r.levelname == 'WARNING']
+    assert len(warnings) == 1
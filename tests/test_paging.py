@@ -0,0 +1,32 @@
+from api_client.base_client import UsersList
+from paging import DepartmentHeading, page_count, page_items
+
+
+def worker(i, department=0):
+    return UsersList(id_number=i, name=f'Worker {i:02}', location=1,
+                     department=department, status=True)
+
+
+WORKERS = tuple(worker(i, department=i % 3) for i in range(1, 11))
+
+
+def test_page_count():
+    assert page_count(0, 4) == 1
+    assert page_count(8, 4) == 2
+    assert page_count(9, 4) == 3
+    assert page_count(1500, 0) == 1
+
+
+def test_pages_are_fixed_size_slices():
+    assert page_items(WORKERS, 0, 4) == WORKERS[:4]
+    assert page_items(WORKERS, 2, 4) == WORKERS[8:]
+    assert page_items(WORKERS, 3, 4) == WORKERS[:4]  # Wraps around
+    assert page_items(WORKERS) == WORKERS
+
+
+def test_department_headings():
+    items = page_items(WORKERS, 1, 4, group_departments=True)
+
+    # Departments 0 (3, 6, 9), 1 (1, 4, 7, 10), 2 (2, 5, 8), by name.
+    assert items == (DepartmentHeading(1), worker(4, 1), worker(7, 1),
+                     worker(10, 1), DepartmentHeading(2), worker(2, 2))
@@ -0,0 +1,19 @@
+from pathlib import Path
+
+from paths import APP_DIRECTORY, data_path
+
+
+def test_relative_paths_resolve_against_the_app_directory(tmp_path,
+                                                          monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    assert data_path('data/thumbnails/') == APP_DIRECTORY / 'data/thumbnails'
+    assert APP_DIRECTORY == Path(__file__).resolve().parent.parent
+
+
+def test_absolute_paths_are_kept(tmp_path):
+    assert data_path(tmp_path / 'history.db') == tmp_path / 'history.db'
+
+
+def test_empty_path_is_disabled():
+    assert data_path('') is None
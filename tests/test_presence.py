@@ -0,0 +1,282 @@
+import time
+
+from api_client.base_client import BaseERPClient, UsersList
+from presence import PresencePoller, PresenceSnapshot
+
+
+class FakeClient(BaseERPClient):
+    def __init__(self, workers):
+        self.workers = workers
+        self.calls = 0
+
+    def get_workers(self):
+        self.calls += 1
+        return list(self.workers)
+
+
+def make_worker(id_number, location=1, status=True):
+    return UsersList(
+        id_number=id_number,
+        name=f'Worker {id_number}',
+        location=location,
+        department=0,
+        status=status
+    )
+
+
+def test_snapshot_starts_empty():
+    poller = PresencePoller(FakeClient([]), interval_seconds=30)
+
+    assert poller.snapshot.version == 0
+    assert poller.snapshot.workers == ()
+    assert poller.snapshot.age_seconds is None
+
+
+def test_refresh_filters_status():
+    client = FakeClient([
+        make_worker(1),
+        make_worker(2, status=False),
+        make_worker(3, location=2),
+    ])
+    poller = PresencePoller(client, interval_seconds=30)
+
+    snapshot = poller.refresh()
+
+    assert [w.id_number for w in snapshot.workers] == [1, 3]
+    assert snapshot.version == 1
+    assert snapshot.age_seconds is not None
+
+
+def test_snapshot_views_by_location_and_department():
+    workers = (
+        make_worker(1, location=1),
+        make_worker(2, location=2),
+        UsersList(3, 'Worker 3', location='Factory', department=5,
+                  status=True),
+    )
+    snapshot = PresenceSnapshot(1, workers)
+
+    assert snapshot.view() == workers
+    assert snapshot.view(location=1) == (workers[0],)
+    assert snapshot.view(location='2') == (workers[1],)
+    assert snapshot.view(location='Factory', department=5) == (workers[2],)
+    assert snapshot.view(department='0') == workers[:2]
+    assert snapshot.view(location=9) == ()
+
+
+def test_version_only_changes_with_workers():
+    client = FakeClient([make_worker(1)])
+    poller = PresencePoller(client, interval_seconds=30)
+
+    first = poller.refresh()
+    second = poller.refresh()
+    assert second.version == first.version
+
+    client.workers = [make_worker(1), make_worker(2)]
+    third = poller.refresh()
+    assert third.version == first.version + 1
+
+
+def test_reading_snapshot_does_not_call_erp():
+    client = FakeClient([make_worker(1)])
+    poller = PresencePoller(client, interval_seconds=30)
+    poller.refresh()
+
+    for _ in range(40):
+        _ = poller.snapshot
+
+    assert client.calls == 1
+
+
+def test_background_thread_publishes_snapshot():
+    client = FakeClient([make_worker(1)])
+    poller = PresencePoller(client, interval_seconds=30)
+
+    poller.start()
+    poller.start()  # Idempotent
+    try:
+        for _ in range(100):
+            if poller.snapshot.version:
+                break
+            time.sleep(0.01)
+    finally:
+        poller.stop(timeout=1)
+
+    assert poller.snapshot.version == 1
+    assert client.calls == 1
+
+
+def test_wait_for_change_returns_on_new_version():
+    import threading
+
+    client = FakeClient([make_worker(1)])
+    poller = PresencePoller(client, interval_seconds=30)
+    version = poller.refresh().version
+
+    client.workers = [make_worker(1), make_worker(2)]
+    threading.Timer(0.05, poller.refresh).start()
+
+    started = time.perf_counter()
+    snapshot = poller.wait_for_change(version, timeout=5)
+
+    assert snapshot.version == version + 1
+    assert time.perf_counter() - started < 5
+
+
+def test_wait_for_change_times_out_without_change():
+    poller = PresencePoller(FakeClient([make_worker(1)]), interval_seconds=30)
+    version = poller.refresh().version
+
+    snapshot = poller.wait_for_change(version, timeout=0.05)
+
+    assert snapshot.version == version
+
+
+class ScheduledClient(FakeClient):
+    def __init__(self, change):
+        super().__init__([])
+        self.change = change
+
+    def next_change(self, now):
+        return self.change
+
+
+def test_next_delay_follows_schedule():
+    from datetime import datetime, timedelta
+
+    now = datetime(2026, 1, 1, 13, 55)
+    client = ScheduledClient(now + timedelta(seconds=45))
+    poller = PresencePoller(client, interval_seconds=30, min_seconds=10,
+                            max_seconds=300)
+
+    assert poller.next_delay(now) == 46
+
+    client.change = now + timedelta(seconds=2)
+    assert poller.next_delay(now) == 10
+
+    client.change = now + timedelta(hours=8)
+    assert poller.next_delay(now) == 300
+
+    client.change = None
+    assert poller.next_delay(now) == 30
+
+
+class FailingClient(FakeClient):
+    def __init__(self, workers):
+        super().__init__(workers)
+        self.failing = False
+
+    def get_workers(self):
+        self.calls += 1
+        if self.failing:
+            raise ConnectionError('ERP down')
+        return list(self.workers)
+
+
+def test_poll_retries_then_serves_stale_snapshot():
+    client = FailingClient([make_worker(1)])
+    poller = PresencePoller(client, interval_seconds=30, retries=2,
+                            backoff_seconds=0)
+    good = poller.poll()
+
+    client.failing = True
+    client.calls = 0
+    stale = poller.poll()
+
+    assert client.calls == 3
+    assert stale.stale
+    assert stale.workers == good.workers
+    assert stale.fetched_at == good.fetched_at
+    assert stale.version == good.version + 1
+    assert poller.stats()['retries'] == 2
+
+
+def test_open_circuit_skips_erp():
+    from resilience import CircuitBreaker
+
+    client = FailingClient([make_worker(1)])
+    client.failing = True
+    poller = PresencePoller(
+        client, interval_seconds=30, retries=0,
+        breaker=CircuitBreaker(failure_threshold=2, cooldown_seconds=60))
+
+    poller.poll()
+    poller.poll()
+    calls = client.calls
+    poller.poll()
+
+    assert client.calls == calls
+    assert poller.stats()['breaker_state'] == 'open'
+    assert poller.snapshot.stale
+    assert poller.snapshot.fetched_at is None
+
+
+def test_recovery_clears_stale_flag():
+    client = FailingClient([make_worker(1)])
+    poller = PresencePoller(client, interval_seconds=30, retries=0)
+    poller.poll()
+    client.failing = True
+    poller.poll()
+
+    client.failing = False
+    snapshot = poller.poll()
+
+    assert not snapshot.stale
+
+
+def test_snapshot_survives_restart(tmp_path):
+    path = tmp_path / 'snapshot.json'
+    client = FailingClient([make_worker(1), make_worker(2)])
+    first = PresencePoller(client, interval_seconds=30, store_path=path)
+    saved = first.refresh()
+
+    client.failing = True
+    second = PresencePoller(client, interval_seconds=30, retries=0,
+                            store_path=path)
+    loaded = second.snapshot
+
+    assert loaded.workers == saved.workers
+    assert loaded.fetched_at == saved.fetched_at
+    assert loaded.stale
+    assert loaded.version > saved.version
+
+    # Still served while the ERP is down
+    assert second.poll().workers == saved.workers
+
+    client.failing = False
+    assert not second.poll().stale
+
+
+def test_first_refresh_publishes_new_version_when_empty():
+    poller = PresencePoller(FakeClient([]), interval_seconds=30,
+                            initial_version=1000)
+
+    snapshot = poller.refresh()
+
+    assert snapshot.version == 1001
+    assert snapshot.fetched_at is not None
+
+
+def test_corrupt_snapshot_file_is_ignored(tmp_path):
+    path = tmp_path / 'snapshot.json'
+    path.write_text('{not json', encoding='utf-8')
+
+    poller = PresencePoller(FakeClient([]), interval_seconds=30,
+                            store_path=path)
+
+    assert poller.snapshot.fetched_at is None
+
+
+def test_listeners_get_every_new_version():
+    client = FakeClient([make_worker(1)])
+    poller = PresencePoller(client, interval_seconds=30)
+    seen = []
+    poller.add_listener(lambda snapshot: seen.append(snapshot.version))
+    poller.add_listener(lambda snapshot: 1 / 0)  # must not stop the poller
+
+    poller.refresh()
+    poller.refresh()
+    client.workers = [make_worker(2)]
+    poller.refresh()
+
+    assert seen == [1, 2]
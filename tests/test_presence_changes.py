@@ -0,0 +1,60 @@
+from api_client.base_client import UsersList
+from presence import PresenceSnapshot
+from presence_changes import ChangeFeed
+
+TOM = UsersList(4001, 'Tom Harnes', 1, 3, True)
+JANE = UsersList(4002, 'Jane Doe', 2, 3, True)
+LUCY = UsersList(4003, 'Lucy Miller', 1, 4, True)
+
+
+def make_feed(*versions, size=256):
+    feed = ChangeFeed(PresenceSnapshot(version=1, workers=(TOM,)),
+                      size=size)
+    for version, workers in enumerate(versions, start=2):
+        feed.record(PresenceSnapshot(version=version, workers=workers))
+    return feed
+
+
+def test_net_changes_merged_over_versions():
+    moved = UsersList(4001, 'Tom Harnes', 2, 3, True)
+    feed = make_feed((TOM, JANE), (JANE,), (moved, JANE, LUCY))
+
+    changes = feed.changes(1)
+
+    assert changes['version'] == 4
+    assert not changes['resync']
+    assert changes['arrivals'] == [JANE, LUCY]
+    assert changes['departures'] == []
+    assert changes['updated'] == [moved]
+
+
+def test_come_and_go_cancels_out():
+    feed = make_feed((TOM, JANE), (TOM,))
+
+    changes = feed.changes(1)
+
+    assert changes['arrivals'] == changes['departures'] == []
+    assert changes['updated'] == []
+    assert feed.changes(4)['resync']  # Not served yet
+
+
+def test_resync_when_aged_out():
+    feed = make_feed((TOM, JANE), (JANE,), (JANE, LUCY), size=2)
+
+    assert feed.changes(1)['resync']
+    assert feed.changes(2)['departures'] == [TOM]
+    assert feed.changes(None) == {'version': 4, 'since': None,
+                                  'resync': True, 'workers': [JANE, LUCY]}
+
+
+def test_view_filtering():
+    moved = UsersList(4001, 'Tom Harnes', 2, 3, True)
+    feed = make_feed((moved, LUCY))
+
+    location1 = feed.changes(1, location='1')
+    location2 = feed.changes(1, location=2)
+
+    assert location1['arrivals'] == [LUCY]
+    assert location1['departures'] == [TOM]
+    assert location2['arrivals'] == [moved]
+    assert feed.changes(1, department='4')['arrivals'] == [LUCY]
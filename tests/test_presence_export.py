@@ -0,0 +1,45 @@
+import json
+from datetime import datetime
+
+from api_client.base_client import UsersList
+from presence import PresenceSnapshot
+from presence_export import PresenceExport, serialize
+
+WORKERS = (
+    UsersList(4002, 'Jane Doe', 2, 3, True),
+    UsersList(4001, 'Tom Harnes', 1, 3, True),
+)
+
+
+def make_snapshot(version=1, workers=WORKERS):
+    return PresenceSnapshot(version=version, workers=workers,
+                            fetched_at=1_767_600_000.0)
+
+
+def test_json_roll_call():
+    data = json.loads(serialize(make_snapshot(), ('1', None), 'json'))
+
+    assert data['count'] == 1
+    fetched_at = datetime.fromisoformat(data['fetched_at'])
+    assert fetched_at.tzinfo is not None
+    assert fetched_at.timestamp() == 1_767_600_000.0
+    assert data['location'] == '1'
+    assert data['workers'] == [{'id_number': 4001, 'name': 'Tom Harnes',
+                                'location': 1, 'department': 3}]
+
+
+def test_csv_roll_call():
+    body = serialize(make_snapshot(), (None, None), 'csv').decode('utf-8')
+
+    assert body.splitlines() == ['id_number,name,location,department',
+                                 '4002,Jane Doe,2,3',
+                                 '4001,Tom Harnes,1,3']
+
+
+def test_serialized_once_per_version():
+    export = PresenceExport()
+    first = export.get(make_snapshot(1), (None, None), 'json')
+
+    assert export.get(make_snapshot(1), (None, None), 'json') is first
+    assert export.get(make_snapshot(2, WORKERS[:1]), (None, None),
+                      'json') is not first
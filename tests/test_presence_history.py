@@ -0,0 +1,101 @@
+from api_client.base_client import UsersList
+from presence import PresenceSnapshot
+from presence_history import DAY_SECONDS, PresenceHistory
+
+T0 = 1_767_600_000.0  # 2026-01-05, a fixed start keeps days predictable
+
+TOM = UsersList(4001, 'Tom Harnes', 1, 3, True)
+JANE = UsersList(4002, 'Jane Doe', 2, 3, True)
+OLA = UsersList(4003, 'Ola Nordmann', 1, 5, True)
+
+
+def snapshot(version, ts, *workers, stale=False):
+    return PresenceSnapshot(version=version, workers=workers,
+                            fetched_at=ts, stale=stale)
+
+
+def make_history(tmp_path, **kwargs):
+    return PresenceHistory(tmp_path / 'history.db', **kwargs)
+
+
+def test_changes_are_recorded_as_events(tmp_path):
+    history = make_history(tmp_path)
+
+    assert history.record(snapshot(1, T0, TOM, JANE)) == 2
+    assert history.record(snapshot(2, T0 + 60, TOM, OLA)) == 2
+
+    assert history.events(T0 + 1, T0 + 60) == [
+        (T0 + 60, 4003, 1), (T0 + 60, 4002, 0)]
+    assert history.events(T0 - 1, T0 + 60, id_number=4002) == [
+        (T0, 4002, 1), (T0 + 60, 4002, 0)]
+
+
+def test_present_at_any_time(tmp_path):
+    history = make_history(tmp_path, checkpoint_seconds=3600)
+    history.record(snapshot(1, T0, TOM, JANE))
+    history.record(snapshot(2, T0 + 600, TOM))
+    history.record(snapshot(3, T0 + 7200, TOM, OLA))
+
+    assert history.present_at(T0 - 1) == ()
+    assert history.present_at(T0 + 300) == (JANE, TOM)
+    assert history.present_at(T0 + 3600) == (TOM,)
+    assert history.present_at(T0 + 9000) == (OLA, TOM)
+
+
+def test_stale_and_old_snapshots_are_ignored(tmp_path):
+    history = make_history(tmp_path)
+    history.record(snapshot(5, T0, TOM))
+
+    assert history.record(snapshot(6, T0 + 60, stale=True)) == 0
+    assert history.record(snapshot(4, T0 + 120)) == 0
+    assert history.present_at(T0 + 120) == (TOM,)
+
+
+def test_history_continues_after_restart(tmp_path):
+    history = make_history(tmp_path)
+    history.record(snapshot(1, T0, TOM, JANE))
+    history.close()
+
+    restarted = make_history(tmp_path)
+    # Jane left while the app was down.
+    assert restarted.record(snapshot(1, T0 + 600, TOM)) == 1
+    assert restarted.present_at(T0 + 600) == (TOM,)
+
+
+def test_retention_keeps_presence_after_the_cutoff(tmp_path):
+    history = make_history(tmp_path, retention_days=1)
+    history.record(snapshot(1, T0, TOM, JANE))
+    history.record(snapshot(2, T0 + 3600, TOM))
+
+    history.compact(now=T0 + DAY_SECONDS + 7200)
+
+    assert history.events(0, T0 + 3600) == []
+    assert history.present_at(T0 + DAY_SECONDS + 3600) == (TOM,)
+
+
+def test_old_checkpoints_are_thinned_to_one_per_day(tmp_path):
+    history = make_history(tmp_path, checkpoint_seconds=3600,
+                           hourly_days=1, retention_days=30)
+    for hour in range(48):
+        history.record(snapshot(hour + 1, T0 + hour * 3600,
+                                *([TOM] if hour % 2 else [JANE])))
+
+    history.compact(now=T0 + 3 * DAY_SECONDS)
+    checkpoints = history._connection().execute(
+        'SELECT COUNT(*) FROM checkpoints').fetchone()[0]
+
+    assert checkpoints <= 3
+    assert history.present_at(T0 + 40 * 3600 + 60) == (JANE,)
+
+
+def test_retention_without_events_before_the_cutoff(tmp_path):
+    history = make_history(tmp_path, retention_days=5)
+    history.record(snapshot(1, T0, TOM))
+    # Compacts on its own: cutoff at day 5, TOM carried into a checkpoint.
+    history.record(snapshot(2, T0 + 10 * DAY_SECONDS, TOM, OLA))
+
+    # Only the day 10 event is left, newer than the cutoff at day 7.
+    history.compact(now=T0 + 12 * DAY_SECONDS)
+
+    assert history.present_at(T0 + 8 * DAY_SECONDS) == (TOM,)
+    assert history.present_at(T0 + 11 * DAY_SECONDS) == (OLA, TOM)
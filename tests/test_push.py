@@ -0,0 +1,52 @@
+from api_client.base_client import BaseERPClient, UsersList
+from presence import PresencePoller
+from push import PushStreams
+
+
+class FakeClient(BaseERPClient):
+    def __init__(self):
+        self.workers = []
+
+    def get_workers(self):
+        return list(self.workers)
+
+
+def test_stream_announces_current_version():
+    poller = PresencePoller(FakeClient(), interval_seconds=30)
+    poller.refresh()
+    streams = PushStreams(poller, keepalive_seconds=0.01)
+
+    events = iter(streams.open())
+
+    assert next(events).startswith('retry:')
+    assert next(events).startswith('event: hello')
+    assert next(events) == 'event: presence\ndata: 1\n\n'
+    assert next(events) == 'event: ping\ndata: 1\n\n'
+
+
+def test_stream_pushes_changes():
+    client = FakeClient()
+    poller = PresencePoller(client, interval_seconds=30)
+    poller.refresh()
+    streams = PushStreams(poller, keepalive_seconds=0.01)
+    events = iter(streams.open())
+    for _ in range(3):
+        next(events)
+
+    client.workers = [UsersList(1, 'Tom', 1, 0, True)]
+    poller.refresh()
+
+    assert next(events) == 'event: presence\ndata: 2\n\n'
+
+
+def test_stream_limit_and_release():
+    poller = PresencePoller(FakeClient(), interval_seconds=30)
+    streams = PushStreams(poller, max_streams=1)
+
+    stream = streams.open()
+    assert streams.open() is None
+
+    stream.close()
+    stream.close()  # Releasing twice must not free a second slot
+    assert streams.active == 0
+    assert streams.open() is not None
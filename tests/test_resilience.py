@@ -0,0 +1,45 @@
+from unittest.mock import patch
+
+from resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, backoff_delay
+
+
+def test_backoff_is_bounded_and_jittered():
+    delays = [backoff_delay(attempt, 1, 30) for attempt in range(10)
+              for _ in range(20)]
+
+    assert all(0 <= d <= 30 for d in delays)
+    assert len(set(delays)) > 1
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=60)
+
+    breaker.record_failure()
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.opened_count == 1
+
+
+def test_breaker_half_open_after_cooldown():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=60)
+
+    with patch('resilience.time.monotonic', return_value=1000):
+        breaker.record_failure()
+    with patch('resilience.time.monotonic', return_value=1061):
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+
+        # A failed trial call re-opens straight away.
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+
+    with patch('resilience.time.monotonic', return_value=1200):
+        assert breaker.allow()
+        breaker.record_success()
+
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
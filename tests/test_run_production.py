@@ -0,0 +1,19 @@
+from run_production import server_options
+
+
+def test_server_options_from_config():
+    options = server_options({'server_port': 9000, 'server_threads': 8,
+                              'server_connection_limit': 200})
+
+    assert options['port'] == 9000
+    assert options['threads'] == 8
+    assert options['connection_limit'] == 200
+
+
+def test_push_streams_get_threads_and_connections():
+    options = server_options({'server_threads': 4,
+                              'server_connection_limit': 10},
+                             push_streams_max=32)
+
+    assert options['threads'] == 36
+    assert options['connection_limit'] == 36
@@ -0,0 +1,32 @@
+from api_client.shift_index import CHECKPOINT_EVERY, ShiftIndex
+
+
+def brute_force(intervals, t):
+    return frozenset(k for k, start, end in intervals if start <= t < end)
+
+
+def test_present_at_matches_brute_force():
+    intervals = [
+        (i, (i * 7) % 600, (i * 7) % 600 + 30 + (i % 5) * 60)
+        for i in range(CHECKPOINT_EVERY * 10)
+    ]
+    index = ShiftIndex(intervals)
+
+    for t in range(-5, 1000, 3):
+        assert index.present_at(t) == brute_force(intervals, t)
+
+
+def test_next_change():
+    index = ShiftIndex([('a', 360, 840), ('b', 420, 960)])
+
+    assert index.next_change(0) == 360
+    assert index.next_change(360) == 420
+    assert index.next_change(900) == 960
+    assert index.next_change(960) is None
+
+
+def test_back_to_back_intervals_stay_present():
+    index = ShiftIndex([('a', 360, 840), ('a', 840, 1200)])
+
+    assert index.present_at(840) == frozenset({'a'})
+    assert index.present_at(1200) == frozenset()
@@ -0,0 +1,105 @@
+import sqlite3
+
+import pytest
+
+from api_client.sql_client import SCHEMA, SQLClient
+
+PERSONS = [
+    (10, 4001, 'Tom', 'Harnes', 1, 3),
+    (11, 4002, 'Jane', 'Doe', 2, 3),
+    (12, 4003, 'Ola', 'Nordmann', 1, 5),
+    (13, None, 'Kari', 'Hansen', 1, None),
+]
+
+ATTENDANCE = [
+    # employee_id, clock_in, clock_out, absence_code
+    (10, '2026-01-05 06:00', None, None),
+    (10, '2026-01-04 06:00', '2026-01-04 14:00', None),  # yesterday
+    (11, '2026-01-05 07:00', None, None),
+    (12, '2026-01-05 06:00', None, 'SICK'),
+    (13, '2026-01-05 06:00', None, None),
+]
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / 'timeclock.db'
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SCHEMA)
+        conn.executemany('INSERT INTO persons VALUES (?, ?, ?, ?, ?, ?)',
+                         PERSONS)
+        conn.executemany(
+            'INSERT INTO attendance (employee_id, clock_in, clock_out, '
+            'absence_code) VALUES (?, ?, ?, ?)', ATTENDANCE)
+    return path
+
+
+def make_client(database, **config):
+    return SQLClient(dict({'db_type': 'sqlite', 'db_name': str(database)},
+                          **config))
+
+
+def test_open_intervals_without_absence(database):
+    workers = make_client(database).get_workers()
+
+    assert [(w.id_number, w.name, w.location, w.department)
+            for w in workers] == [
+        (4002, 'Jane Doe', 2, 3),
+        (13, 'Kari Hansen', 1, 0),
+        (4001, 'Tom Harnes', 1, 3),
+    ]
+
+
+def test_locations_are_filtered_in_the_query(database):
+    client = make_client(database, db_locations=[1])
+
+    assert {w.id_number for w in client.get_workers()} == {4001, 13}
+    assert 'location_id IN (?)' in client._sql
+
+
+def test_connection_is_reused_between_refreshes(database):
+    client = make_client(database)
+    client.get_workers()
+    client.get_workers()
+
+    assert client.pool.created == 1
+    assert client.stats()['queries'] == 2
+
+
+def test_new_clock_in_is_seen_on_the_next_refresh(database):
+    client = make_client(database)
+    client.get_workers()
+
+    with sqlite3.connect(database) as conn:
+        conn.execute("UPDATE attendance SET absence_code = NULL "
+                     "WHERE employee_id = 12")
+
+    assert 4003 in {w.id_number for w in client.get_workers()}
+
+
+class DroppedConnection:
+    def cursor(self):
+        raise sqlite3.OperationalError('server closed the connection')
+
+    def close(self):
+        pass
+
+
+def test_dropped_connection_is_replaced(database):
+    client = make_client(database)
+    client.pool._idle.put_nowait(DroppedConnection())
+
+    assert len(client.get_workers()) == 3
+    assert client.pool.created == 1
+
+
+def test_missing_database_is_an_error(tmp_path):
+    client = make_client(tmp_path / 'missing.db')
+
+    with pytest.raises(sqlite3.OperationalError):
+        client.get_workers()
+
+
+def test_invalid_db_type():
+    with pytest.raises(ValueError, match='db_type'):
+        SQLClient({'db_type': 'oracle'})
@@ -0,0 +1,62 @@
+import gzip
+import os
+
+from static_assets import StaticAssets
+
+
+def make_assets(tmp_path):
+    (tmp_path / 'bg.png').write_bytes(b'\x89PNG background')
+    (tmp_path / 'style.css').write_text(
+        "body { background: url('../assets/bg.png'); }\n"
+        "@import url('https://fonts.example.com/css');\n" * 20)
+    return StaticAssets(tmp_path)
+
+
+def test_url_carries_content_hash(tmp_path):
+    assets = make_assets(tmp_path)
+
+    url = assets.url(tmp_path / 'bg.png')
+    (tmp_path / 'bg.png').write_bytes(b'\x89PNG another background')
+    os.utime(tmp_path / 'bg.png', ns=(0, 0))
+
+    assert url.startswith('/assets/bg.png?v=')
+    assert assets.url(tmp_path / 'bg.png') != url
+    assert assets.url('elsewhere/logo.png') == 'elsewhere/logo.png'
+
+
+def test_stylesheet_precompressed_with_hashed_references(tmp_path):
+    assets = make_assets(tmp_path)
+
+    assert assets.build() == 2
+    css = assets.get('style.css')
+    body = css.bodies['identity'].decode()
+
+    assert f"url('{assets.url(tmp_path / 'bg.png')}')" in body
+    assert 'https://fonts.example.com/css' in body
+    assert gzip.decompress(css.bodies['gzip']) == css.bodies['identity']
+    assert assets.get('bg.png').bodies == {}
+
+
+def test_stylesheet_hash_follows_referenced_files(tmp_path):
+    assets = make_assets(tmp_path)
+    before = assets.get('style.css').digest
+
+    (tmp_path / 'bg.png').write_bytes(b'\x89PNG new background')
+    os.utime(tmp_path / 'bg.png', ns=(0, 0))
+
+    assert assets.get('style.css').digest != before
+
+
+def test_files_outside_directory_not_served(tmp_path):
+    assets = make_assets(tmp_path)
+
+    assert assets.get('../secret.txt') is None
+    assert assets.get('missing.css') is None
+
+
+def test_url_with_known_stamp_touches_no_file(tmp_path):
+    assets = make_assets(tmp_path)
+    stamp = assets.get('bg.png').digest
+
+    assert assets.url(tmp_path / 'photos' / 'missing.png', stamp) == \
+        f'/assets/photos/missing.png?v={stamp}'
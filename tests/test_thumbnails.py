@@ -0,0 +1,84 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip('PIL')
+
+from PIL import Image
+
+from thumbnails import ThumbnailCache
+
+
+@pytest.fixture
+def photo(tmp_path):
+    path = tmp_path / 'photos' / '4001.png'
+    path.parent.mkdir()
+    Image.new('RGB', (1200, 900), 'steelblue').save(path)
+    return path
+
+
+def test_thumbnail_is_card_sized(tmp_path, photo):
+    cache = ThumbnailCache(tmp_path / 'thumbs', size=128)
+
+    path, digest = cache.get(photo, 'png')
+
+    with Image.open(path) as img:
+        assert img.size == (128, 128)
+    assert digest in path.name
+
+
+def test_thumbnail_is_generated_once(tmp_path, photo):
+    cache = ThumbnailCache(tmp_path / 'thumbs', size=128)
+
+    first, _ = cache.get(photo, 'webp')
+    mtime = first.stat().st_mtime_ns
+    second, _ = cache.get(photo, 'webp')
+
+    assert first == second
+    assert second.stat().st_mtime_ns == mtime
+
+
+def test_changed_photo_gets_new_thumbnail(tmp_path, photo):
+    cache = ThumbnailCache(tmp_path / 'thumbs', size=128)
+    first, _ = cache.get(photo, 'png')
+
+    Image.new('RGB', (600, 600), 'orange').save(photo)
+    second, _ = cache.get(photo, 'png')
+
+    assert first != second
+    assert not first.exists()  # Outdated derivative deleted
+
+
+def test_concurrent_requests_render_once(tmp_path, photo, monkeypatch):
+    cache = ThumbnailCache(tmp_path / 'thumbs', size=64)
+    render = cache._render
+    renders = []
+
+    def counted(*args):
+        renders.append(args)
+        time.sleep(0.05)
+        render(*args)
+
+    monkeypatch.setattr(cache, '_render', counted)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        paths = set(pool.map(lambda _: cache.get(photo, 'png')[0], range(8)))
+
+    assert len(paths) == 1
+    assert len(renders) == 1
+
+
+def test_prune_deletes_derivatives_of_missing_photos(tmp_path, photo):
+    cache = ThumbnailCache(tmp_path / 'thumbs', size=64)
+    kept, _ = cache.get(photo, 'png')
+    (tmp_path / 'thumbs' / 'deadbeef_64.png').write_bytes(b'old')
+
+    assert cache.prune([photo]) == 1
+    assert list((tmp_path / 'thumbs').iterdir()) == [kept]
+
+
+def test_warm_generates_both_formats(tmp_path, photo):
+    cache = ThumbnailCache(tmp_path / 'thumbs', size=64)
+
+    assert cache.warm([photo], workers=2) == 2
+    assert len(list((tmp_path / 'thumbs').iterdir())) == 2
@@ -0,0 +1,207 @@
+import argparse
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import yaml
+
+from logger import logger
+from paths import data_path
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow is optional, originals are served without it
+    Image = None
+
+"""
+Thumbnails
+----------
+
+Generates card-sized, compressed copies of employee photos so kiosks don't
+download full-size originals on every reload.
+
+Each derivative is created once per source file and stored in the
+thumbnail directory, named after the content hash of the source and the
+thumbnail size. A changed photo gets a new hash and therefore a new
+derivative, and the derivatives of the old hash are deleted. Concurrent
+requests for the same derivative wait for a single render. WebP is
+produced for browsers that accept it, PNG otherwise.
+
+Pillow is needed to generate thumbnails. Without it the app falls back to
+serving the original images.
+
+The thumbnail directory can be pre-warmed from the command line, which
+can also delete derivatives of photos that no longer exist (e.g. replaced
+while the app wasn't running):
+    python thumbnails.py
+    python thumbnails.py --workers 8 --size 256
+    python thumbnails.py --prune
+"""
+
+READ_CHUNK = 1024 * 1024
+
+
+class ThumbnailCache:
+    def __init__(self, directory: str | Path, size: int = 256,
+                 quality: int = 80) -> None:
+        self.directory = Path(directory)
+        self.size = size
+        self.quality = quality
+
+        # Source path -> (mtime, size, content hash)
+        self._hashes: dict[str, tuple[float, int, str]] = {}
+        # Target path -> lock held while it is rendered
+        self._rendering: dict[Path, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return Image is not None and self.size > 0
+
+    @property
+    def webp_supported(self) -> bool:
+        return self.available and features.check('webp')
+
+    def content_hash(self, source: Path) -> str:
+        """ Hash of the file content, memoized on path, mtime and size. """
+        stat = source.stat()
+        cached = self._hashes.get(str(source))
+        if cached is not None and cached[:2] == (stat.st_mtime, stat.st_size):
+            return cached[2]
+
+        sha = hashlib.sha1()
+        with open(source, mode='rb') as f:
+            for chunk in iter(lambda: f.read(READ_CHUNK), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()[:20]
+
+        with self._lock:
+            self._hashes[str(source)] = (stat.st_mtime, stat.st_size, digest)
+            replaced = cached is not None and cached[2] != digest and all(
+                d != cached[2] for _, _, d in self._hashes.values())
+        if replaced:
+            self._delete(cached[2])
+        return digest
+
+    def get(self, source: str | Path, fmt: str = 'webp'
+            ) -> tuple[Path, str]:
+        """ Returns the derivative path and content hash, creating it once. """
+        source = Path(source)
+        if fmt == 'webp' and not self.webp_supported:
+            fmt = 'png'
+
+        digest = self.content_hash(source)
+        target = self.directory / f'{digest}_{self.size}.{fmt}'
+
+        if not target.exists():
+            with self._lock:
+                lock = self._rendering.setdefault(target, threading.Lock())
+            with lock:
+                # Rendered by another request while this one waited.
+                if not target.exists():
+                    self._render(source, target, fmt)
+            with self._lock:
+                self._rendering.pop(target, None)
+
+        return target, digest
+
+    def prune(self, sources: list[Path]) -> int:
+        """ Deletes derivatives of content not in sources, returns count. """
+        if not self.directory.is_dir():
+            return 0
+        digests = {self.content_hash(s) for s in sources}
+        removed = 0
+        for path in self.directory.iterdir():
+            digest = path.name.split('_', 1)[0]
+            if path.is_file() and digest not in digests:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def warm(self, sources: list[Path], workers: int = 4) -> int:
+        """ Generates WebP and PNG derivatives for all sources in parallel. """
+        jobs = [(s, fmt) for s in sources for fmt in ('webp', 'png')]
+
+        def run(job) -> bool:
+            try:
+                self.get(*job)
+                return True
+            except (OSError, ValueError) as e:
+                logger.warning(f'Thumbnail failed for {job[0]}: {e}')
+                return False
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return sum(pool.map(run, jobs))
+
+    def _delete(self, digest: str) -> None:
+        for path in self.directory.glob(f'{digest}_*'):
+            path.unlink(missing_ok=True)
+            logger.debug(f'Deleted outdated thumbnail {path.name}')
+
+    def _render(self, source: Path, target: Path, fmt: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(
+            f'{target.name}.{threading.get_ident()}.tmp')
+
+        with Image.open(source) as img:
+            img = ImageOps.exif_transpose(img)
+            # Cards show photos as centred squares (object-fit: cover).
+            img = ImageOps.fit(img, (self.size, self.size))
+            if img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGBA')
+
+            if fmt == 'webp':
+                img.save(tmp_path, 'WEBP', quality=self.quality, method=4)
+            else:
+                img.save(tmp_path, 'PNG', optimize=True)
+
+        os.replace(tmp_path, target)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Pre-generate employee photo thumbnails.')
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--source', help='Image directory to process')
+    parser.add_argument('--target', help='Thumbnail directory')
+    parser.add_argument('--size', type=int)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4)
+    parser.add_argument('--prune', action='store_true',
+                        help='Delete thumbnails of photos that are gone')
+    args = parser.parse_args()
+
+    config = {}
+    if os.path.exists(args.config):
+        with open(args.config, mode='r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+
+    source = Path(args.source or config.get('image_directory',
+                                            'assets/employee_images/'))
+    cache = ThumbnailCache(
+        args.target or data_path(config.get('thumbnail_directory',
+                                            'data/thumbnails/')),
+        size=args.size or config.get('thumbnail_size', 256)
+    )
+
+    if not cache.available:
+        raise SystemExit('Pillow is required: pip install pillow')
+
+    extensions = ('.png', '.jpg', '.jpeg', '.webp')
+    sources = [p for p in source.iterdir() if p.suffix.lower() in extensions]
+
+    if args.prune:
+        removed = cache.prune(sources)
+        logger.info(f'Deleted {removed} outdated thumbnails')
+
+    started = time.perf_counter()
+    done = cache.warm(sources, workers=args.workers)
+    logger.info(
+        f'Generated {done} thumbnails for {len(sources)} images in '
+        f'{time.perf_counter() - started:.1f}s ({cache.directory})')
+
+
+if __name__ == '__main__':
+    main()